@@ -2,8 +2,21 @@ import os
 from flask import Flask
 from dotenv import load_dotenv
 
+from .advisor import init_query_log
+from .cache import init_cache
+from .change_feed import init_change_feed
+from .columnar import init_columnar
 from .config import Config
+from .db_routing import configure_engines, init_db_routing
 from .extensions import db, migrate
+from .filters import init_filters
+from .fragments import init_fragments
+from .guardrails import init_guardrails
+from .images import init_images
+from .instrumentation import init_instrumentation
+from .serialization import init_serialization
+from .stats import init_stats
+from .suggest import init_suggest
 
 
 def create_app() -> Flask:
@@ -15,15 +28,38 @@ def create_app() -> Flask:
     app.config.from_object(Config())
 
     # Initialize extensions
+    configure_engines(app)
     db.init_app(app)
     migrate.init_app(app, db)
+    init_filters(app)
+    init_cache(app)
+    init_fragments(app)
+    init_images(app)
+    init_instrumentation(app)
+    init_query_log(app)
+    init_db_routing(app)
+    init_guardrails(app)
+    init_serialization(app)
+    init_stats(app)
+    init_change_feed(app)
+    init_columnar(app)
+    init_suggest(app)
 
     # Register blueprints
+    from .routes.alerts import alerts_bp
+    from .routes.images import images_bp
+    from .routes.metrics import metrics_bp
     from .routes.pages import pages_bp
     from .routes.properties import api_bp
+    from .routes.stats import stats_bp
 
     app.register_blueprint(pages_bp)
+    app.register_blueprint(images_bp)
     app.register_blueprint(api_bp, url_prefix="/api")
+    app.register_blueprint(stats_bp, url_prefix="/api")
+    app.register_blueprint(alerts_bp, url_prefix="/api")
+    if app.config.get("METRICS_ENABLED", True):
+        app.register_blueprint(metrics_bp)
 
     # Register CLI commands
     from .cli import register_cli
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from flask import Flask, request, request_finished
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+
+from .cache import NullCache
+from .extensions import db
+from .filters import FILTER_PARAMS
+
+# Endpoints whose requests QUERY_SHAPE_LOG records
+LOGGED_ENDPOINTS = ("properties.list_properties",)
+
+# Filters that can lead an index as equality matches. city/state/zipcode
+# are ILIKE (lower(col) LIKE ...), which no plain index serves.
+EQUALITY_COLUMNS = {"type": "property_type"}
+RANGE_COLUMNS = {
+    "min_price": "price",
+    "max_price": "price",
+    "min_bed": "bedrooms",
+    "max_bed": "bedrooms",
+    "min_bath": "bathrooms",
+    "max_bath": "bathrooms",
+}
+# Page-mode sorts; keyset pagination adds id as the tie-breaker
+SORT_COLUMNS = {
+    "newest": ("created_at", "id"),
+    "price_asc": ("price", "id"),
+    "price_desc": ("price", "id"),
+}
+
+_log_lock = threading.Lock()
+
+
+def _log_request(sender: Flask, response, **extra) -> None:
+    if request.endpoint not in LOGGED_ENDPOINTS or response.status_code != 200:
+        return
+    line = json.dumps({"endpoint": request.endpoint, "path": request.full_path.rstrip("?")})
+    with _log_lock:
+        with open(sender.config["QUERY_SHAPE_LOG"], "a") as fh:
+            fh.write(line + "\n")
+
+
+def init_query_log(app: Flask) -> None:
+    """Append each list request to QUERY_SHAPE_LOG (JSON lines) for ``flask db-advise``."""
+    if app.config.get("QUERY_SHAPE_LOG"):
+        request_finished.connect(_log_request, app)
+
+
+def shape_of(args: Dict[str, str]) -> str:
+    """Filter/sort shape of a list request: which filters, which sort and paging mode."""
+    names = sorted(name for name in FILTER_PARAMS if args.get(name))
+    sort = args.get("sort") or "newest"
+    mode = "cursor" if args.get("cursor") is not None or args.get("paginate") == "cursor" else "page"
+    return " ".join([f"sort={sort}", f"paginate={mode}", *names])
+
+
+def read_log(lines: Iterable[str]) -> Tuple[Counter, Dict[str, str]]:
+    """Count shapes in a log of JSON lines or bare request paths; keep one sample path each."""
+    counts: Counter = Counter()
+    samples: Dict[str, str] = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        path = json.loads(line)["path"] if line.startswith("{") else line
+        url = urlsplit(path)
+        if not url.path.endswith("/properties"):
+            continue
+        args = dict(parse_qsl(url.query))
+        # Cursor tokens are opaque and may be stale; explain the first page instead
+        if args.pop("cursor", None) is not None:
+            args["paginate"] = "cursor"
+        shape = shape_of(args)
+        counts[shape] += 1
+        samples.setdefault(shape, "/api/properties?" + urlencode(args))
+    return counts, samples
+
+
+def _layout(shape: str) -> Tuple[List[str], List[str], List[str]]:
+    """Split a shape into its equality, sort and range columns."""
+    parts = shape.split()
+    sort = parts[0].split("=", 1)[1]
+    names = parts[2:]
+    equality = list(dict.fromkeys(EQUALITY_COLUMNS[name] for name in names if name in EQUALITY_COLUMNS))
+    ordering = [column for column in SORT_COLUMNS.get(sort, ()) if column not in equality]
+    ranges = [RANGE_COLUMNS[name] for name in names if name in RANGE_COLUMNS]
+    ranges = [column for column in dict.fromkeys(ranges) if column not in equality + ordering]
+    return equality, ordering, ranges
+
+
+def proposed_index(shape: str) -> Optional[Tuple[str, ...]]:
+    """Equality columns, then sort columns, then range columns (the ESR rule).
+
+    Range columns after the sort keep the index order usable for ORDER BY
+    and let the range filters be checked inside the index instead of on
+    table rows.
+    """
+    equality, ordering, ranges = _layout(shape)
+    columns = tuple(equality + ordering + ranges)
+    # Nothing beyond what the (sort key, id) indexes already provide
+    if not columns or columns in SORT_COLUMNS.values():
+        return None
+    return columns
+
+
+def index_name(table: str, columns: Sequence[str]) -> str:
+    return f"idx_{table}_" + "_".join(column for column in columns if column != "id")
+
+
+@dataclass
+class Statement:
+    sql: str
+    parameters: Any
+    plan: List[str] = field(default_factory=list)
+    problems: List[str] = field(default_factory=list)
+
+
+def capture(app: Flask, path: str) -> List[Statement]:
+    """Run one request through the app and record the SELECTs it issues."""
+    captured: List[Statement] = []
+
+    def before(conn, cursor, statement, parameters, context, executemany) -> None:
+        if not conn.info.get("perf_explaining") and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append(Statement(statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", before)
+    try:
+        app.test_client().get(path)
+    finally:
+        event.remove(Engine, "before_cursor_execute", before)
+    return captured
+
+
+def _plan(engine: Engine, statement: Statement) -> None:
+    """Fill in ``statement.plan`` and any full scans or sorts it shows."""
+    dialect = engine.dialect.name
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "mysql": "EXPLAIN "}.get(dialect)
+    if prefix is None:
+        statement.problems.append(f"EXPLAIN not supported on {dialect}")
+        return
+    with engine.connect() as conn:
+        conn.info["perf_explaining"] = True
+        result = conn.exec_driver_sql(prefix + statement.sql, statement.parameters)
+        rows = [dict(row._mapping) for row in result]
+
+    if dialect == "sqlite":
+        # Plan nodes under a correlated subquery run once per outer row
+        correlated = set()
+        for row in rows:
+            detail = row["detail"]
+            statement.plan.append(detail)
+            if detail.startswith("CORRELATED") or row["parent"] in correlated:
+                correlated.add(row["id"])
+            where = " in correlated subquery" if row["id"] in correlated else ""
+            if detail.startswith("SCAN ") and "USING" not in detail and "properties_fts" not in detail:
+                statement.problems.append(f"full scan{where}: {detail}")
+            if "USE TEMP B-TREE FOR ORDER BY" in detail:
+                statement.problems.append(f"sort not served by an index{where}")
+    else:
+        for row in rows:
+            statement.plan.append(
+                f"{row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                f"rows={row.get('rows')} {row.get('Extra') or ''}".rstrip()
+            )
+            if row.get("type") == "ALL":
+                statement.problems.append(f"full scan of {row.get('table')}")
+            if "filesort" in (row.get("Extra") or ""):
+                statement.problems.append("sort not served by an index")
+
+
+@dataclass
+class Advice:
+    shape: str
+    requests: int
+    sample: str
+    statements: List[Statement]
+    index: Optional[Tuple[str, ...]]
+    # How many of ``index``'s columns are equality/sort columns
+    leading: int = 0
+    covered_by: Optional[str] = None
+
+
+def existing_indexes(engine: Engine, table: str) -> Dict[str, Tuple[str, ...]]:
+    return {index["name"]: tuple(index["column_names"]) for index in inspect(engine).get_indexes(table)}
+
+
+def advise(app: Flask, lines: Iterable[str], top: int = 20) -> List[Advice]:
+    """EXPLAIN the most frequent shapes in a request log and propose indexes.
+
+    A proposal is dropped when an existing index already starts with the
+    proposed equality and sort columns.
+    """
+    counts, samples = read_log(lines)
+    # Every request must reach the database to be captured
+    app.extensions["response_cache"] = NullCache()
+    with app.app_context():
+        engine = db.engine
+        indexes = existing_indexes(engine, "properties")
+
+    results = []
+    for shape, requests in counts.most_common(top):
+        statements = capture(app, samples[shape])
+        for statement in statements:
+            _plan(engine, statement)
+        advice = Advice(shape, requests, samples[shape], statements, proposed_index(shape))
+        if advice.index is not None:
+            equality, ordering, _ = _layout(shape)
+            advice.leading = len(equality + ordering) or len(advice.index)
+            leading = advice.index[: advice.leading]
+            for name, columns in indexes.items():
+                if columns[: len(leading)] == leading:
+                    advice.covered_by = name
+                    break
+        results.append(advice)
+    return results
+
+
+def merge_proposals(results: Iterable[Advice]) -> List[Tuple[Tuple[str, ...], int]]:
+    """One index per equality+sort prefix, most requested first.
+
+    Shapes that share a prefix differ only in their range filters; their
+    range columns are appended in order of how many requests use them.
+    """
+    requests: Counter = Counter()
+    trailing: Dict[Tuple[str, ...], Counter] = {}
+    for advice in results:
+        if advice.index is None or advice.covered_by:
+            continue
+        prefix = advice.index[: advice.leading]
+        requests[prefix] += advice.requests
+        weights = trailing.setdefault(prefix, Counter())
+        for column in advice.index[advice.leading :]:
+            weights[column] += advice.requests
+    return [
+        (prefix + tuple(column for column, _ in trailing[prefix].most_common()), count)
+        for prefix, count in requests.most_common()
+    ]
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import product, takewhile
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import func, insert, select
+
+from .filters import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, float_arg, int_arg
+from .geo import haversine_km, parse_bbox, parse_point
+from .models import AlertNotification, AlertRun, Property, PropertyChange, SavedSearch
+
+# list_properties filters a saved search can hold
+RANGE_PARAMS = {
+    "min_price": int_arg,
+    "max_price": int_arg,
+    "min_bed": int_arg,
+    "max_bed": int_arg,
+    "min_bath": float_arg,
+    "max_bath": float_arg,
+}
+# Index keys: param -> Property attribute. Matched case-insensitively, like the ILIKE filters.
+EQUALITY_PARAMS = {"state": "state", "city": "city", "type": "property_type", "zipcode": "zipcode"}
+# Comma-separated coordinates, only meaningful as strings
+POINT_PARAMS = ("bbox", "near")
+UNSUPPORTED_PARAMS = ("q",)
+
+# Checked per candidate after the index lookup: param -> (attribute, is lower bound)
+CHECKED_BOUNDS = {
+    "min_bed": ("bedrooms", True),
+    "max_bed": ("bedrooms", False),
+    "min_bath": ("bathrooms", True),
+    "max_bath": ("bathrooms", False),
+}
+
+ALERT_FIELDS = (
+    Property.id,
+    Property.price,
+    Property.bedrooms,
+    Property.bathrooms,
+    Property.latitude,
+    Property.longitude,
+    Property.state,
+    Property.city,
+    Property.property_type,
+    Property.zipcode,
+)
+
+# Change kinds that raise alerts, and the reason recorded for each
+ALERT_KINDS = {"insert": "new", "reprice": "repriced"}
+
+_INF = math.inf
+# SECRET_KEY's default in config.py and .env.example; never good enough to sign with
+PUBLIC_DEFAULT_KEY = "dev-secret-change-me"
+
+
+class AlertError(ValueError):
+    """Raised for filters a saved search cannot hold."""
+
+
+def search_token(search_id: int) -> Optional[str]:
+    """Secret that lets its holder manage one saved search; handed out on create.
+
+    Notification senders put it in unsubscribe links. None when
+    SAVED_SEARCH_TOKEN_KEY is unset or is the public default secret: a key
+    anyone knows would let anyone forge tokens.
+    """
+    key = current_app.config.get("SAVED_SEARCH_TOKEN_KEY")
+    if not key or key == PUBLIC_DEFAULT_KEY:
+        return None
+    return hmac.new(key.encode(), f"saved-search:{search_id}".encode(), hashlib.sha256).hexdigest()
+
+
+def _is_scalar(value: Any) -> bool:
+    if isinstance(value, float):
+        return math.isfinite(value)  # the JSON parser accepts NaN and Infinity
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+def parse_filters(args: Mapping[str, Any]) -> Dict[str, Any]:
+    """Normalize list_properties query args into saved-search filters.
+
+    Paging, sorting and unknown params are dropped. Full-text ``q`` is
+    rejected: it cannot be evaluated outside the database. Values come
+    from a JSON body, so anything but a string or number (and, for bbox
+    and near, anything but a string) is rejected too.
+    """
+    if any(args.get(name) for name in UNSUPPORTED_PARAMS):
+        raise AlertError("saved searches cannot use q")
+    for name in (*RANGE_PARAMS, *EQUALITY_PARAMS, "radius_km"):
+        value = args.get(name)
+        if value is not None and not _is_scalar(value):
+            raise AlertError(f"{name} must be a string or number")
+    for name in POINT_PARAMS:
+        if args.get(name) is not None and not isinstance(args[name], str):
+            raise AlertError(f"{name} must be a string")
+    filters: Dict[str, Any] = {}
+    for name, parse in RANGE_PARAMS.items():
+        if args.get(name) not in (None, ""):
+            value = parse(args, name)
+            if value is None or not math.isfinite(value):
+                raise AlertError(f"{name} must be a number")
+            filters[name] = value
+    for bound in ("price", "bed", "bath"):
+        if filters.get(f"min_{bound}", -_INF) > filters.get(f"max_{bound}", _INF):
+            raise AlertError(f"min_{bound} must not be greater than max_{bound}")
+    for name in EQUALITY_PARAMS:
+        if args.get(name):
+            filters[name] = str(args[name]).strip()
+    if args.get("bbox"):
+        if parse_bbox(args["bbox"]) is None:
+            raise AlertError("bbox must be min_lon,min_lat,max_lon,max_lat")
+        filters["bbox"] = args["bbox"]
+    if args.get("near"):
+        if parse_point(args["near"]) is None:
+            raise AlertError("near must be lat,lon")
+        filters["near"] = args["near"]
+        radius = float_arg(args, "radius_km")
+        if radius is not None and radius > 0:
+            filters["radius_km"] = min(radius, MAX_RADIUS_KM)
+    if not filters:
+        raise AlertError("a saved search needs at least one filter")
+    return filters
+
+
+class IntervalTree:
+    """Static centered interval tree: which ``[lo, hi]`` intervals contain a point.
+
+    A stabbing query costs ``O(log n + hits)``. Open bounds are +/- infinity.
+    """
+
+    __slots__ = ("center", "by_lo", "by_hi", "left", "right")
+
+    def __init__(self, intervals: Sequence[Tuple[float, float, int]]) -> None:
+        # lo > hi holds no point, and splitting on it recurses forever; rows saved before validation may have it
+        intervals = [interval for interval in intervals if interval[0] <= interval[1]]
+        points = sorted(bound for lo, hi, _ in intervals for bound in (lo, hi) if math.isfinite(bound))
+        self.center = points[len(points) // 2] if points else 0.0
+        here, left, right = [], [], []
+        for interval in intervals:
+            lo, hi, _ = interval
+            if hi < self.center:
+                left.append(interval)
+            elif lo > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        self.by_lo = sorted(here, key=lambda interval: interval[0])
+        self.by_hi = sorted(here, key=lambda interval: -interval[1])
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def stab(self, point: float) -> List[int]:
+        found: List[int] = []
+        node: Optional[IntervalTree] = self
+        while node is not None:
+            if point < node.center:
+                found.extend(key for lo, _, key in takewhile(lambda i: i[0] <= point, node.by_lo))
+                node = node.left
+            elif point > node.center:
+                found.extend(key for _, hi, key in takewhile(lambda i: i[1] >= point, node.by_hi))
+                node = node.right
+            else:
+                found.extend(key for _, _, key in node.by_lo)
+                node = None
+        return found
+
+
+def _norm(value: Optional[str]) -> Optional[str]:
+    return value.casefold() if value is not None else None
+
+
+def _within(filters: Mapping[str, Any], row: Any) -> bool:
+    """The filters the index doesn't cover: bed/bath bounds and bbox/near."""
+    for name, (column, lower) in CHECKED_BOUNDS.items():
+        if name in filters:
+            value = getattr(row, column)
+            if value is None or (value < filters[name] if lower else value > filters[name]):
+                return False
+    if "bbox" in filters or "near" in filters:
+        if row.latitude is None or row.longitude is None:
+            return False
+    if "bbox" in filters:
+        min_lon, min_lat, max_lon, max_lat = parse_bbox(filters["bbox"])
+        if min_lon <= max_lon:
+            lon_ok = min_lon <= row.longitude <= max_lon
+        else:
+            lon_ok = row.longitude >= min_lon or row.longitude <= max_lon
+        if not (lon_ok and min_lat <= row.latitude <= max_lat):
+            return False
+    if "near" in filters:
+        lat, lon = parse_point(filters["near"])
+        if haversine_km(lat, lon, row.latitude, row.longitude) > filters.get("radius_km", DEFAULT_RADIUS_KM):
+            return False
+    return True
+
+
+class SearchMatcher:
+    """Finds the saved searches a listing matches without testing every search.
+
+    Searches are bucketed by their equality filters (state, city, type,
+    zipcode; unset ones are wildcards), and each bucket keeps an interval
+    tree over price ranges. A listing probes the 16 buckets its own values
+    can fall into, stabs each tree at its price, and only the searches
+    returned are checked against the remaining filters.
+    """
+
+    def __init__(self, searches: Iterable[Tuple[int, Mapping[str, Any]]]) -> None:
+        self.filters: Dict[int, Mapping[str, Any]] = {}
+        buckets: Dict[Tuple[Optional[str], ...], List[Tuple[float, float, int]]] = defaultdict(list)
+        for search_id, filters in searches:
+            self.filters[search_id] = filters
+            key = tuple(_norm(filters.get(name)) for name in EQUALITY_PARAMS)
+            buckets[key].append((filters.get("min_price", -_INF), filters.get("max_price", _INF), search_id))
+        self.trees = {key: IntervalTree(intervals) for key, intervals in buckets.items()}
+
+    def __len__(self) -> int:
+        return len(self.filters)
+
+    def match(self, row: Any) -> List[int]:
+        values = [_norm(getattr(row, column)) for column in EQUALITY_PARAMS.values()]
+        matched = []
+        for key in product(*((value, None) for value in values)):
+            tree = self.trees.get(key)
+            if tree is None:
+                continue
+            for search_id in tree.stab(row.price):
+                if _within(self.filters[search_id], row):
+                    matched.append(search_id)
+        return matched
+
+
+def load_matcher(session) -> SearchMatcher:
+    rows = session.execute(select(SavedSearch.id, SavedSearch.filters).where(SavedSearch.active.is_(True)))
+    return SearchMatcher((search_id, json.loads(filters)) for search_id, filters in rows)
+
+
+def last_position(session) -> Optional[int]:
+    return session.scalar(select(AlertRun.position).order_by(AlertRun.id.desc()).limit(1))
+
+
+def run_alerts(session, batch_size: int = 1000, settle_seconds: float = 0) -> Tuple[int, int]:
+    """Match new and repriced listings since the last run and fill the outbox.
+
+    Reads ``property_changes`` after the previous run's position, one
+    batch at a time. Each batch's outbox rows and its AlertRun position
+    commit together, so a crashed run resumes without duplicates or gaps.
+    The first run only records the current log position. Returns
+    ``(changes read, notifications queued)``.
+    """
+    position = last_position(session)
+    if position is None:
+        start = session.scalar(select(func.max(PropertyChange.id))) or 0
+        session.add(AlertRun(position=start))
+        session.commit()
+        return 0, 0
+
+    matcher = load_matcher(session)
+    read = queued = 0
+    cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    while True:
+        entries = session.execute(
+            select(PropertyChange.id, PropertyChange.property_id, PropertyChange.kind, PropertyChange.changed_at)
+            .where(PropertyChange.id > position)
+            .order_by(PropertyChange.id)
+            .limit(batch_size)
+        ).all()
+        settled = list(takewhile(lambda entry: entry.changed_at <= cutoff, entries))
+        if not settled:
+            break
+
+        # property id -> reason; a listing both inserted and repriced in one batch is "new"
+        reasons: Dict[int, str] = {}
+        for entry in settled:
+            if entry.kind in ALERT_KINDS:
+                reasons.setdefault(entry.property_id, ALERT_KINDS[entry.kind])
+        notifications = []
+        if reasons and len(matcher):
+            now = datetime.utcnow()
+            for row in session.execute(select(*ALERT_FIELDS).where(Property.id.in_(list(reasons)))):
+                for search_id in matcher.match(row):
+                    notifications.append(
+                        {
+                            "saved_search_id": search_id,
+                            "property_id": row.id,
+                            "reason": reasons[row.id],
+                            "price": row.price,
+                            "created_at": now,
+                        }
+                    )
+        if notifications:
+            session.execute(insert(AlertNotification.__table__), notifications)
+        position = settled[-1].id
+        session.add(AlertRun(position=position, changes=len(settled), notifications=len(notifications)))
+        session.commit()
+
+        read += len(settled)
+        queued += len(notifications)
+        if len(settled) < batch_size:
+            break
+    return read, queued
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import sys
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, current_app, g, request, request_started
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from werkzeug.exceptions import HTTPException
+
+from .db_routing import REPLICA_PREFIX, STICKY_COOKIE
+from .fulltext import fulltext_backend, fulltext_probed
+
+# Sync driver -> asyncio driver used by the ASGI app
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+}
+
+# Pool settings that carry over from SQLALCHEMY_ENGINE_OPTIONS
+_POOL_OPTIONS = ("pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping")
+
+
+def async_url(url: URL) -> URL:
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"no asyncio driver configured for {backend!r} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+class AsyncDatabase:
+    """Asyncio engines mirroring the app's primary and replica binds.
+
+    Each ``all``/``scalar`` call checks out its own connection, so
+    independent queries can be awaited concurrently.
+    """
+
+    def __init__(self, app: Flask) -> None:
+        db = app.extensions["sqlalchemy"]
+        options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+        pool = {key: options[key] for key in _POOL_OPTIONS if key in options}
+        with app.app_context():
+            # Engine URLs as Flask-SQLAlchemy resolved them (absolute SQLite
+            # paths, MySQL charset)
+            urls = {key: engine.url for key, engine in db.engines.items()}
+        self.primary = self._engine(urls[None], pool)
+        self.replicas = [
+            self._engine(url, pool) for key, url in urls.items() if key and key.startswith(REPLICA_PREFIX)
+        ]
+        self.dialect = self.primary.dialect.name
+
+    @staticmethod
+    def _engine(url: URL, pool: Dict[str, Any]) -> AsyncEngine:
+        if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+            pool = {}
+        return create_async_engine(async_url(url), **pool)
+
+    def reader(self) -> AsyncEngine:
+        """Replica for this request, or the primary for clients that just wrote."""
+        if "async_reader" not in g:
+            sticky = request.cookies.get(STICKY_COOKIE)
+            g.async_reader = random.choice(self.replicas) if self.replicas and not sticky else self.primary
+        return g.async_reader
+
+    async def all(self, statement) -> List[Any]:
+        # Legacy Query objects carry their SELECT in .statement
+        statement = getattr(statement, "statement", statement)
+        async with self.reader().connect() as conn:
+            return (await conn.execute(statement)).all()
+
+    async def scalar(self, statement) -> Any:
+        async with self.reader().connect() as conn:
+            return (await conn.execute(statement)).scalar()
+
+    async def dispose(self) -> None:
+        for engine in [self.primary, *self.replicas]:
+            await engine.dispose()
+
+
+def async_db() -> AsyncDatabase:
+    return current_app.extensions["async_db"]
+
+
+def _environ(scope: Dict[str, Any]) -> Dict[str, Any]:
+    """WSGI environ for a body-less ASGI HTTP request."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client")
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0] if client else "",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        value = raw_value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class AsyncApp:
+    """ASGI app serving the read API with coroutine views.
+
+    GET/HEAD requests for endpoints in ``ASYNC_VIEWS`` run on the event
+    loop inside a normal Flask request context, so config, the response
+    cache, JSON provider, error handlers and Server-Timing behave as in
+    WSGI mode. Everything else is passed to the Flask WSGI app on a thread
+    pool.
+    """
+
+    def __init__(self, app: Flask, wsgi: Any) -> None:
+        from .routes.async_properties import ASYNC_VIEWS
+
+        self.app = app
+        self.wsgi = wsgi
+        self.views = ASYNC_VIEWS
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            await self._http(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.app.extensions["async_db"].dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _match(self, environ: Dict[str, Any]) -> Optional[Any]:
+        adapter = self.app.url_map.bind_to_environ(environ, server_name=self.app.config["SERVER_NAME"])
+        try:
+            endpoint, _ = adapter.match()
+        except HTTPException:
+            # 404s, 405s and slash redirects are answered by the WSGI app
+            return None
+        return self.views.get(endpoint)
+
+    async def _http(self, scope, receive, send) -> None:
+        environ = _environ(scope)
+        view = self._match(environ)
+        if view is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        app = self.app
+        ctx = app.request_context(environ)
+        ctx.push()
+        try:
+            # Flask's full_dispatch_request, with an awaited view
+            try:
+                try:
+                    request_started.send(app)
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        if not fulltext_probed():
+                            # The views' sync helpers probe once per process with a blocking query
+                            await asyncio.to_thread(fulltext_backend)
+                        rv = await view(**request.view_args)
+                except Exception as exc:
+                    rv = app.handle_user_exception(exc)
+                response = app.finalize_request(rv)
+            except Exception as exc:
+                response = app.handle_exception(exc)
+
+            body = b"" if scope["method"] == "HEAD" else response.get_data()
+            headers = [
+                (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in response.headers.items()
+            ]
+            await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+        finally:
+            ctx.pop()
+
+
+def create_asgi_app(app: Optional[Flask] = None) -> AsyncApp:
+    """ASGI entry point around ``create_app()``; see asgi.py at the repo root."""
+    from a2wsgi import WSGIMiddleware
+
+    from . import create_app
+
+    app = app or create_app()
+    app.extensions["async_db"] = AsyncDatabase(app)
+    return AsyncApp(app, WSGIMiddleware(app))
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from functools import wraps
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from flask import Flask, current_app, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from .models import Property, PropertyImage
+
+_DIRTY_FLAG = "response_cache_dirty"
+# Caches whose entries are derived from query results and dropped on every
+# committed write. The fragment cache is keyed by row version instead.
+WRITE_INVALIDATED = ("response_cache", "page_cache")
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime] = None
+    mimetype: str = "application/json"
+
+
+class ResponseCache:
+    """Interface shared by the cache backends.
+
+    Keys are namespaced by a generation number; ``invalidate()`` bumps it so
+    every earlier entry becomes unreachable at once. Callers read the
+    generation *before* querying the database and store under that same
+    generation, so a response computed from pre-write data can never be
+    served after the write's invalidation.
+    """
+
+    def generation(self) -> int:
+        raise NotImplementedError
+
+    def get(self, key: str, generation: Optional[int] = None) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, generation: Optional[int] = None) -> None:
+        raise NotImplementedError
+
+    def get_many(self, keys: List[str], generation: Optional[int] = None) -> Dict[str, Any]:
+        """Fetch several keys at once; misses are left out of the result."""
+        found = {}
+        for key in keys:
+            value = self.get(key, generation)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def invalidate(self) -> None:
+        raise NotImplementedError
+
+
+class NullCache(ResponseCache):
+    def generation(self) -> int:
+        return 0
+
+    def get(self, key: str, generation: Optional[int] = None) -> Any:
+        return None
+
+    def set(self, key: str, value: Any, generation: Optional[int] = None) -> None:
+        pass
+
+    def invalidate(self) -> None:
+        pass
+
+
+class MemoryCache(ResponseCache):
+    """Per-process LRU with a TTL. Other workers only see writes via TTL expiry."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[float, Any]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: str, generation: Optional[int] = None) -> Any:
+        gen = self._generation if generation is None else generation
+        with self._lock:
+            item = self._entries.get((gen, key))
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._entries[(gen, key)]
+                return None
+            self._entries.move_to_end((gen, key))
+            return value
+
+    def set(self, key: str, value: Any, generation: Optional[int] = None) -> None:
+        gen = self._generation if generation is None else generation
+        with self._lock:
+            if gen != self._generation:
+                return
+            self._entries[(gen, key)] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((gen, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+class RedisCache(ResponseCache):
+    """Shared cache for multi-worker deployments; needs the ``redis`` package."""
+
+    def __init__(self, url: str, ttl: float = 30.0, prefix: str = "redfin:cache:") -> None:
+        try:
+            import redis
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, key: str, generation: Optional[int]) -> str:
+        gen = self.generation() if generation is None else generation
+        return f"{self.prefix}{gen}:{key}"
+
+    def generation(self) -> int:
+        return int(self._client.get(f"{self.prefix}generation") or 0)
+
+    def get(self, key: str, generation: Optional[int] = None) -> Any:
+        raw = self._client.get(self._key(key, generation))
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, generation: Optional[int] = None) -> None:
+        self._client.set(self._key(key, generation), pickle.dumps(value), ex=max(1, int(self.ttl)))
+
+    def get_many(self, keys: List[str], generation: Optional[int] = None) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        gen = self.generation() if generation is None else generation
+        raws = self._client.mget([self._key(key, gen) for key in keys])
+        return {key: pickle.loads(raw) for key, raw in zip(keys, raws) if raw is not None}
+
+    def invalidate(self) -> None:
+        # Old generations are left to expire via their TTL
+        self._client.incr(f"{self.prefix}generation")
+
+
+def create_cache(
+    config: Mapping[str, Any],
+    ttl: Optional[float] = None,
+    max_entries: Optional[int] = None,
+    namespace: str = "cache",
+) -> ResponseCache:
+    """Build a cache on the configured backend; TTL and size default to CACHE_TTL/CACHE_MAX_ENTRIES."""
+    backend = (config.get("CACHE_BACKEND") or "memory").lower()
+    ttl = float(config.get("CACHE_TTL", 30) if ttl is None else ttl)
+    if backend == "memory":
+        max_entries = int(config.get("CACHE_MAX_ENTRIES", 1024) if max_entries is None else max_entries)
+        return MemoryCache(max_entries=max_entries, ttl=ttl)
+    if backend == "redis":
+        return RedisCache(config["CACHE_REDIS_URL"], ttl=ttl, prefix=f"redfin:{namespace}:")
+    if backend in ("none", "null", "off"):
+        return NullCache()
+    raise ValueError(f"unknown CACHE_BACKEND {backend!r}")
+
+
+def get_cache(name: str = "response_cache") -> ResponseCache:
+    return current_app.extensions[name]
+
+
+def cache_key(endpoint: str, view_args: Mapping[str, Any], args: Iterable[Tuple[str, str]]) -> str:
+    """Normalize a request into a key: blank params dropped, the rest sorted."""
+    params = sorted((k, v) for k, v in args if v != "")
+    parts = [endpoint]
+    parts += [f"{k}={v}" for k, v in sorted(view_args.items())]
+    parts += [f"{k}={v}" for k, v in params]
+    return "|".join(parts)
+
+
+def entry_for(response) -> CachedResponse:
+    body = response.get_data()
+    return CachedResponse(
+        body=body,
+        etag=hashlib.sha1(body).hexdigest(),
+        last_modified=response.last_modified,
+        mimetype=response.mimetype,
+    )
+
+
+def _serve(entry: CachedResponse):
+    response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    if entry.last_modified is not None:
+        response.last_modified = entry.last_modified
+    return response.make_conditional(request)
+
+
+def cached_response(view, cache_name: str = "response_cache"):
+    """Cache a view's 200 responses and answer conditional GETs from them.
+
+    The view may set ``last_modified`` on its response; the ETag is a hash of
+    the body so it also changes when rows drop out of a result set.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = get_cache(cache_name)
+        key = cache_key(request.endpoint or view.__name__, kwargs, request.args.items(multi=True))
+        generation = cache.generation()
+        entry = cache.get(key, generation)
+        if entry is None:
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            entry = entry_for(response)
+            cache.set(key, entry, generation)
+        return _serve(entry)
+
+    return wrapper
+
+
+def cached_page(view):
+    """``cached_response`` on the page cache (PAGE_CACHE_TTL, PAGE_CACHE_MAX_ENTRIES)."""
+    return cached_response(view, "page_cache")
+
+
+def async_cached_response(view):
+    """``cached_response`` for coroutine views (see asgi.py).
+
+    Keys use ``request.endpoint``, so an async view shares its entries with
+    the WSGI view of the same endpoint.
+    """
+
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        cache = get_cache()
+        key = cache_key(request.endpoint or view.__name__, kwargs, request.args.items(multi=True))
+        generation = cache.generation()
+        entry = cache.get(key, generation)
+        if entry is None:
+            response = current_app.make_response(await view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            entry = entry_for(response)
+            cache.set(key, entry, generation)
+        return _serve(entry)
+
+    return wrapper
+
+
+def invalidate_caches() -> None:
+    """Drop the current app's response and page caches."""
+    for name in WRITE_INVALIDATED:
+        cache = current_app.extensions.get(name)
+        if cache is not None:
+            cache.invalidate()
+
+
+def _mark_dirty(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info[_DIRTY_FLAG] = True
+
+
+def _after_commit(session: Session) -> None:
+    if session.info.pop(_DIRTY_FLAG, False) and has_app_context():
+        invalidate_caches()
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY_FLAG, None)
+
+
+_listeners_installed = False
+
+
+def init_cache(app: Flask) -> None:
+    """Attach the configured backends and write-driven invalidation.
+
+    Mapper events only flag the session; the caches are dropped once the
+    transaction commits, so readers can't repopulate them from rows that are
+    still uncommitted (or about to be rolled back).
+    """
+    global _listeners_installed
+    config = app.config
+    app.extensions["response_cache"] = create_cache(config)
+    app.extensions["page_cache"] = create_cache(
+        config, config.get("PAGE_CACHE_TTL"), config.get("PAGE_CACHE_MAX_ENTRIES"), namespace="pages"
+    )
+    app.extensions["fragment_cache"] = create_cache(
+        config, config.get("FRAGMENT_CACHE_TTL"), config.get("FRAGMENT_CACHE_MAX_ENTRIES"), namespace="fragments"
+    )
+
+    if _listeners_installed:
+        return
+    for model in (Property, PropertyImage):
+        for name in ("after_insert", "after_update", "after_delete"):
+            event.listen(model, name, _mark_dirty)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
+    _listeners_installed = True
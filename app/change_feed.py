@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from flask import Flask
+from sqlalchemy import event, func, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from .models import Property, PropertyChange, PropertyImage
+from .projections import RowSerializer
+
+# When one flush touches a listing more than once, the strongest kind is logged
+_PRECEDENCE = {"update": 0, "reprice": 1, "insert": 2, "delete": 3}
+
+
+class FeedError(ValueError):
+    """Raised for a ``since`` value that is neither a feed token nor a timestamp."""
+
+
+def encode_token(position: int) -> str:
+    raw = json.dumps({"c": position}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_token(token: str) -> int:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded.encode()))["c"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise FeedError("invalid since token") from exc
+
+
+def resolve_since(session: Session, since: Optional[str]) -> int:
+    """Feed position to read after: a token, an ISO-8601 UTC timestamp, or the start."""
+    if not since:
+        return 0
+    try:
+        return decode_token(since)
+    except FeedError:
+        pass
+    try:
+        moment = datetime.fromisoformat(since.replace("Z", "+00:00"))
+    except ValueError as exc:
+        raise FeedError("since must be a feed token or an ISO-8601 timestamp") from exc
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    first = session.scalar(select(func.min(PropertyChange.id)).where(PropertyChange.changed_at >= moment))
+    if first is not None:
+        return first - 1
+    return session.scalar(select(func.max(PropertyChange.id))) or 0
+
+
+def read_changes(
+    session: Session, position: int, limit: int, serialize: RowSerializer, settle_seconds: float = 0
+) -> Dict[str, Any]:
+    """Up to ``limit`` log entries after ``position``, compacted to one per listing.
+
+    Each listing appears once, at its latest change in the batch, as an
+    ``upsert`` with its current fields or a ``delete`` once the row is
+    gone. Entries younger than ``settle_seconds`` are held back: log ids
+    are allocated before commit, so a still-open transaction can commit
+    an id below one a client has already read past.
+    """
+    entries = session.execute(
+        select(PropertyChange.id, PropertyChange.property_id, PropertyChange.changed_at)
+        .where(PropertyChange.id > position)
+        .order_by(PropertyChange.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if settle_seconds:
+        cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+        settled = next((i for i, entry in enumerate(entries) if entry.changed_at > cutoff), len(entries))
+        if settled < len(entries):
+            entries, has_more = entries[:settled], False
+
+    # property id -> position of its last change in this batch
+    latest: Dict[int, int] = {}
+    for entry in entries:
+        latest.pop(entry.property_id, None)
+        latest[entry.property_id] = entry.id
+
+    rows = {}
+    if latest:
+        query = serialize.project(Property.query.filter(Property.id.in_(list(latest))))
+        rows = {row.id: row for row in query}
+
+    changes: List[Dict[str, Any]] = []
+    for property_id in latest:
+        row = rows.get(property_id)
+        if row is None:
+            changes.append({"op": "delete", "id": property_id})
+        else:
+            changes.append({"op": "upsert", "id": property_id, "property": serialize(row)})
+
+    return {
+        "changes": changes,
+        "next": encode_token(entries[-1].id if entries else position),
+        "has_more": has_more,
+    }
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    """Log this flush's listing and image writes in the same transaction."""
+    kinds: Dict[int, str] = {}
+
+    def note(property_id: Optional[int], kind: str) -> None:
+        if property_id is not None and _PRECEDENCE[kind] >= _PRECEDENCE[kinds.get(property_id, "update")]:
+            kinds[property_id] = kind
+
+    for obj in session.new:
+        if isinstance(obj, Property):
+            note(obj.id, "insert")
+        elif isinstance(obj, PropertyImage):
+            note(obj.property_id, "update")
+    for obj in session.deleted:
+        if isinstance(obj, Property):
+            note(obj.id, "delete")
+        elif isinstance(obj, PropertyImage):
+            note(obj.property_id, "update")
+    for obj in session.dirty:
+        if isinstance(obj, Property) and session.is_modified(obj):
+            note(obj.id, "reprice" if inspect(obj).attrs.price.history.has_changes() else "update")
+        elif isinstance(obj, PropertyImage) and session.is_modified(obj):
+            note(obj.property_id, "update")
+
+    if kinds:
+        now = datetime.utcnow()
+        session.connection().execute(
+            insert(PropertyChange.__table__),
+            [{"property_id": pid, "kind": kind, "changed_at": now} for pid, kind in kinds.items()],
+        )
+
+
+def log_inserts(session: Session, property_ids: List[int]) -> None:
+    """Log Core bulk inserts, which bypass the flush hook."""
+    if property_ids:
+        now = datetime.utcnow()
+        session.execute(
+            insert(PropertyChange.__table__),
+            [{"property_id": pid, "kind": "insert", "changed_at": now} for pid in property_ids],
+        )
+
+
+_listeners_installed = False
+
+
+def init_change_feed(app: Flask) -> None:
+    """Record every ORM write to Property/PropertyImage in ``property_changes``."""
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Session, "after_flush", _after_flush)
+        _listeners_installed = True
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from .models import Property
+
+# (values before, values after); None on the missing side for inserts/deletes
+Change = Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+def _values(obj: Property, fields: Sequence[str], old: bool) -> Dict[str, Any]:
+    attrs = inspect(obj).attrs
+    values = {}
+    for field in fields:
+        history = attrs[field].history
+        if old and (history.deleted or history.unchanged):
+            values[field] = (history.deleted or history.unchanged)[0]
+        else:
+            values[field] = getattr(obj, field)
+    return values
+
+
+def property_changes(session: Session, fields: Sequence[str]) -> List[Change]:
+    """Property rows this flush inserts, deletes or changes in any of ``fields``.
+
+    Call from ``after_flush``, while the session still holds the pre-flush
+    new/dirty/deleted sets and attribute history.
+    """
+    changes: List[Change] = []
+    for obj in session.new:
+        if isinstance(obj, Property):
+            changes.append((None, _values(obj, fields, old=False)))
+    for obj in session.deleted:
+        if isinstance(obj, Property):
+            changes.append((_values(obj, fields, old=True), None))
+    for obj in session.dirty:
+        if isinstance(obj, Property) and session.is_modified(obj):
+            before, after = _values(obj, fields, old=True), _values(obj, fields, old=False)
+            if before != after:
+                changes.append((before, after))
+    return changes
@@ -1,20 +1,43 @@
 from __future__ import annotations
 
+import os
 import random
-from typing import List
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
 
 import click
 from faker import Faker
+from sqlalchemy import func, insert, select
 
+from .advisor import advise, index_name, merge_proposals
+from .alerts import last_position, run_alerts
+from .cache import get_cache, invalidate_caches
+from .change_feed import log_inserts
+from .columnar import ColumnStore, np
 from .extensions import db
 from .models import Property, PropertyImage
+from .seeding import generate_batch
+from .stats import rebuild
 
 
 def register_cli(app) -> None:
     @app.cli.command("seed")
     @click.option("--count", default=100, help="Number of properties to create.")
-    def seed_command(count: int) -> None:
+    @click.option("--bulk", is_flag=True, help="Insert in batches with Core executemany instead of the ORM.")
+    @click.option("--batch-size", default=5000, show_default=True, help="Properties per batch in --bulk mode.")
+    @click.option("--workers", default=1, show_default=True, help="Processes generating rows in --bulk mode.")
+    @click.option("--seed", "seed", type=int, default=None, help="Random seed for reproducible data.")
+    def seed_command(count: int, bulk: bool, batch_size: int, workers: int, seed: Optional[int]) -> None:
         """Seed the database with fake properties and images."""
+        if bulk:
+            _bulk_seed(count, batch_size, workers, seed)
+            return
+
+        if seed is not None:
+            random.seed(seed)
+            Faker.seed(seed)
         fake = Faker()
         property_types: List[str] = ["house", "condo", "townhouse", "apartment"]
 
@@ -69,3 +92,131 @@ def register_cli(app) -> None:
 
         db.session.commit()
         click.echo(f"Done. Created {created} properties.")
+
+    @app.cli.command("rebuild-stats")
+    def rebuild_stats_command() -> None:
+        """Recompute the market-stats rollups from every property."""
+        _rebuild_stats()
+
+    @app.cli.command("columnar-snapshot")
+    @click.option("--dir", "directory", default=None, help="Snapshot directory (default: COLUMNAR_SNAPSHOT_DIR).")
+    def columnar_snapshot_command(directory: Optional[str]) -> None:
+        """Scan properties into a column-store snapshot that workers memory-map on start."""
+        directory = directory or app.config.get("COLUMNAR_SNAPSHOT_DIR")
+        if not directory:
+            raise click.UsageError("No snapshot directory: pass --dir or set COLUMNAR_SNAPSHOT_DIR.")
+        if np is None:
+            raise click.UsageError("columnar-snapshot requires the 'numpy' package.")
+        os.makedirs(directory, exist_ok=True)
+        started = time.perf_counter()
+        store = ColumnStore.build(db.session, app.config.get("CHANGE_FEED_SETTLE_SECONDS", 2))
+        name = store.save(directory)
+        click.echo(f"Wrote snapshot {name} ({len(store)} properties) in {time.perf_counter() - started:.1f}s.")
+
+    @app.cli.command("run-alerts")
+    @click.option("--batch-size", default=1000, show_default=True, help="Change-log entries per transaction.")
+    def run_alerts_command(batch_size: int) -> None:
+        """Queue saved-search alerts for listings added or repriced since the last run."""
+        first = last_position(db.session) is None
+        started = time.perf_counter()
+        read, queued = run_alerts(db.session, batch_size, app.config.get("CHANGE_FEED_SETTLE_SECONDS", 2))
+        if first:
+            click.echo("First run: alerts start from the current change-log position.")
+            return
+        click.echo(f"Processed {read} changes, queued {queued} notifications in {time.perf_counter() - started:.1f}s.")
+
+    @app.cli.command("db-advise")
+    @click.option("--log", "log_path", default=None, help="Request log to read (default: QUERY_SHAPE_LOG).")
+    @click.option("--top", default=25, show_default=True, help="Number of most frequent shapes to explain.")
+    def db_advise_command(log_path: Optional[str], top: int) -> None:
+        """EXPLAIN the most frequent list-query shapes and propose composite indexes."""
+        _db_advise(app, log_path or app.config.get("QUERY_SHAPE_LOG"), top)
+
+
+def _rebuild_stats() -> None:
+    started = time.perf_counter()
+    scanned = rebuild(db.session.connection())
+    db.session.commit()
+    get_cache().invalidate()
+    click.echo(f"Rebuilt market stats from {scanned} properties in {time.perf_counter() - started:.1f}s.")
+
+
+def _db_advise(app, log_path: Optional[str], top: int) -> None:
+    if not log_path:
+        raise click.UsageError("No request log: pass --log or set QUERY_SHAPE_LOG.")
+    try:
+        with open(log_path) as fh:
+            results = advise(app, fh, top)
+    except FileNotFoundError:
+        raise click.UsageError(f"Request log not found: {log_path}")
+
+    for advice in results:
+        click.echo(f"\n{advice.requests:>8}  {advice.shape}")
+        click.echo(f"          {advice.sample}")
+        for statement in advice.statements:
+            for problem in dict.fromkeys(statement.problems):
+                click.echo(f"          ! {problem}")
+        if advice.covered_by:
+            click.echo(f"          served by {advice.covered_by}")
+        elif advice.index is not None:
+            click.echo(f"          wants {advice.index}")
+
+    proposals = merge_proposals(results)
+    if not proposals:
+        click.echo("\nNo new indexes proposed.")
+        return
+    click.echo("\n# Proposed indexes (requests served):")
+    for columns, requests in proposals:
+        name = index_name("properties", columns)
+        click.echo(f"op.create_index('{name}', 'properties', {list(columns)!r})  # {requests}")
+
+
+def _bulk_seed(count: int, batch_size: int, workers: int, seed: Optional[int]) -> None:
+    """Load ``count`` properties in batches, committing once per batch.
+
+    Property ids are pre-allocated after the current max(id) so image rows
+    can reference them without a round trip; do not run this alongside other
+    writers. Generation can be spread over a process pool while the parent
+    does all the inserting.
+    """
+    first_id = (db.session.scalar(select(func.max(Property.id))) or 0) + 1
+    jobs = [
+        (index, first_id + offset, min(batch_size, count - offset), seed)
+        for index, offset in enumerate(range(0, count, batch_size))
+    ]
+
+    click.echo(f"Bulk seeding {count} properties in {len(jobs)} batches with {workers} worker(s)...")
+    started = time.perf_counter()
+    created = 0
+
+    def batches() -> Iterator:
+        if workers <= 1:
+            yield from map(generate_batch, jobs)
+            return
+        # At most 2 * workers batches in flight, so finished batches can't pile
+        # up in memory when inserting falls behind generating
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for job in jobs:
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(generate_batch, job))
+            while pending:
+                yield pending.popleft().result()
+
+    for properties, images in batches():
+        db.session.execute(insert(Property.__table__), properties)
+        db.session.execute(insert(PropertyImage.__table__), images)
+        log_inserts(db.session, [prop["id"] for prop in properties])
+        db.session.commit()
+        created += len(properties)
+        elapsed = time.perf_counter() - started
+        click.echo(f"Committed {created} properties ({created / elapsed:,.0f} rows/sec)...")
+
+    # Core inserts skip the mapper events that normally drop cached responses,
+    # maintain the market-stats rollups and write the change log
+    invalidate_caches()
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"Done. Created {created} properties in {elapsed:.1f}s ({created / max(elapsed, 1e-9):,.0f} rows/sec).")
+    _rebuild_stats()
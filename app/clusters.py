@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from sqlalchemy import Integer, case, cast, func, select
+
+from .extensions import db
+from .models import Property
+
+MAX_ZOOM = 20
+# Each 256px map tile is split into an 8x8 grid of clusters (~32px apart).
+CELLS_PER_TILE = 8
+
+
+def cell_deg(zoom: int) -> float:
+    return 360.0 / (2 ** zoom * CELLS_PER_TILE)
+
+
+def _floor(expr):
+    # Offsets below are non-negative, so SQLite's truncating CAST is floor();
+    # MySQL's CAST rounds and needs FLOOR().
+    if db.engine.dialect.name == "sqlite":
+        return cast(expr, Integer)
+    return func.floor(expr)
+
+
+def clusters(query, zoom: int) -> List[Dict[str, Any]]:
+    """Aggregate an already-filtered ``Property`` query into map clusters.
+
+    Rows are bucketed on a lat/lon grid sized for ``zoom`` and reduced in the
+    database to count, centroid and min/median/max price per cell. The median
+    comes from a per-cell price ranking, so it needs window functions
+    (SQLite 3.25+, MySQL 8).
+    """
+    size = cell_deg(zoom)
+    row = _floor((Property.latitude + 90) / size).label("row")
+    col = _floor((Property.longitude + 180) / size).label("col")
+
+    ranked = (
+        query.filter(Property.latitude.isnot(None), Property.longitude.isnot(None))
+        .with_entities(
+            row,
+            col,
+            Property.id,
+            Property.price,
+            Property.latitude,
+            Property.longitude,
+            func.row_number().over(partition_by=(row, col), order_by=Property.price).label("rn"),
+            func.count().over(partition_by=(row, col)).label("n"),
+        )
+        .order_by(None)
+        .subquery()
+    )
+    middle = ranked.c.rn.in_([(ranked.c.n + 1) // 2, (ranked.c.n + 2) // 2])
+    statement = select(
+        ranked.c.row,
+        ranked.c.col,
+        func.count().label("count"),
+        func.avg(ranked.c.latitude).label("lat"),
+        func.avg(ranked.c.longitude).label("lon"),
+        func.min(ranked.c.price).label("min_price"),
+        func.avg(case((middle, ranked.c.price))).label("median_price"),
+        func.max(ranked.c.price).label("max_price"),
+        func.min(ranked.c.id).label("id"),
+    ).group_by(ranked.c.row, ranked.c.col)
+
+    result = []
+    for r in db.session.execute(statement):
+        min_lat, min_lon = r.row * size - 90, r.col * size - 180
+        cluster: Dict[str, Any] = {
+            "count": r.count,
+            "lat": float(r.lat),
+            "lon": float(r.lon),
+            "min_price": r.min_price,
+            "median_price": float(r.median_price),
+            "max_price": r.max_price,
+            "bbox": [min_lon, min_lat, min_lon + size, min_lat + size],
+        }
+        if r.count == 1:
+            cluster["id"] = r.id
+        result.append(cluster)
+    return result
@@ -0,0 +1,506 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import takewhile
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from .changes import property_changes
+from .extensions import db
+from .filters import float_arg, int_arg
+from .guardrails import no_timeout
+from .models import Property, PropertyChange
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Columns kept in memory; every other field is hydrated from the database
+FIELDS = ("id", "price", "bedrooms", "bathrooms", "created_at", "property_type", "city", "state", "zipcode")
+NUMERIC = {"id": "int64", "price": "int64", "bedrooms": "int32", "bathrooms": "float64", "created_at": "int64"}
+# Dictionary-encoded strings; True where the SQL filter is ILIKE, so matching is case-insensitive
+STRINGS = {"property_type": False, "city": True, "state": True, "zipcode": True}
+
+# list_properties params the engine evaluates: param -> (column, op, parser)
+RANGE_FILTERS = {
+    "min_price": ("price", ">=", int_arg),
+    "max_price": ("price", "<=", int_arg),
+    "min_bed": ("bedrooms", ">=", int_arg),
+    "max_bed": ("bedrooms", "<=", int_arg),
+    "min_bath": ("bathrooms", ">=", float_arg),
+    "max_bath": ("bathrooms", "<=", float_arg),
+}
+EQUALITY_FILTERS = {"type": "property_type", "city": "city", "state": "state", "zipcode": "zipcode"}
+# Anything here sends the request to the database
+UNSUPPORTED_PARAMS = ("q", "bbox", "near", "facets", "cursor")
+
+# sort -> (key column, descending?). Rows are stored in id order, so a stable
+# argsort on the key alone orders ties by id, like the (key, id) indexes.
+SORTS = {"newest": ("created_at", True), "price_asc": ("price", False), "price_desc": ("price", True)}
+SORT_KEYS = ("created_at", "price")
+
+# Past this many moved rows, a permutation is re-sorted instead of patched
+REPOSITION_MAX = 256
+CATCH_UP_BATCH = 5000
+
+_CHANGES = "columnar_changes"
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _micros(value: datetime) -> int:
+    return (value - _EPOCH) // _MICROSECOND
+
+
+class _Dictionary:
+    """String <-> int32 code mapping for one column. Codes are never reused."""
+
+    def __init__(self, values: List[str], folded: bool) -> None:
+        self.values = values
+        self.folded = folded
+        self.codes = {value: code for code, value in enumerate(values)}
+
+    def _key(self, value: str) -> str:
+        return value.casefold() if self.folded else value
+
+    def encode(self, value: str) -> int:
+        key = self._key(value)
+        code = self.codes.get(key)
+        if code is None:
+            code = len(self.values)
+            self.values.append(key)
+            self.codes[key] = code
+        return code
+
+    def lookup(self, value: str) -> int:
+        return self.codes.get(self._key(value), -1)
+
+
+@dataclass
+class ColumnQuery:
+    sort: str
+    ranges: List[Tuple[str, str, Any]] = field(default_factory=list)
+    equals: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def parse_query(args: Mapping[str, Any]) -> Optional[ColumnQuery]:
+    """The engine's version of a list_properties request, or None if it needs SQL."""
+    if any(args.get(name) for name in UNSUPPORTED_PARAMS) or args.get("paginate") == "cursor":
+        return None
+    sort = args.get("sort") or "newest"
+    # Like the SQL path, relevance/distance without q/near fall back to newest
+    query = ColumnQuery(sort if sort in SORTS else "newest")
+    for name, (column, op, parse) in RANGE_FILTERS.items():
+        value = parse(args, name)
+        if value is not None:
+            query.ranges.append((column, op, value))
+    for name, column in EQUALITY_FILTERS.items():
+        value = args.get(name)
+        if value:
+            # ILIKE patterns with wildcards are left to the database
+            if STRINGS[column] and ("%" in value or "_" in value):
+                return None
+            query.equals.append((column, value))
+    return query
+
+
+@dataclass
+class _State:
+    """One consistent version of the columns. Writers build a new one; readers never see a half-applied batch."""
+
+    arrays: Dict[str, Any]
+    alive: Any
+    perms: Dict[str, Any]
+
+
+def _locate(sorted_keys, perm, key, position: int) -> int:
+    """Index of ``(key, position)`` in a permutation ordered by (key, position)."""
+    lo = int(np.searchsorted(sorted_keys, key, "left"))
+    hi = int(np.searchsorted(sorted_keys, key, "right"))
+    return lo + int(np.searchsorted(perm[lo:hi], position))
+
+
+def _reposition(perm, old_keys, removed: List[Tuple[Any, int]], added: List[Tuple[Any, int]]):
+    """Patch a sorted permutation: drop ``removed`` entries, then insert ``added`` in place."""
+    sorted_keys = old_keys[perm]
+    if removed:
+        indices = [_locate(sorted_keys, perm, key, position) for key, position in removed]
+        perm = np.delete(perm, indices)
+        sorted_keys = np.delete(sorted_keys, indices)
+    if added:
+        added = sorted(added)
+        indices = [_locate(sorted_keys, perm, key, position) for key, position in added]
+        perm = np.insert(perm, indices, [position for _, position in added])
+    return perm
+
+
+class ColumnStore:
+    """Listing columns as NumPy arrays, for filter/sort/paginate without SQL.
+
+    Rows are stored in id order. Each sort key has a presorted permutation
+    of row positions; a search builds a boolean mask from the filters and
+    walks the permutation (backwards for descending sorts), so a page plus
+    an exact total costs a few vectorized passes over the arrays.
+
+    ``position`` is the last ``property_changes`` entry reflected, so a
+    store loaded from a snapshot only has to replay the log after it.
+    """
+
+    def __init__(
+        self,
+        arrays: Dict[str, Any],
+        dictionaries: Dict[str, _Dictionary],
+        position: int,
+        alive=None,
+        perms: Optional[Dict[str, Any]] = None,
+        snapshot: Optional[str] = None,
+    ) -> None:
+        if alive is None:
+            alive = np.ones(len(arrays["id"]), dtype=bool)
+        if perms is None:
+            perms = {key: np.argsort(arrays[key], kind="stable") for key in SORT_KEYS}
+        self._state = _State(arrays, alive, perms)
+        self.dictionaries = dictionaries
+        self.position = position
+        self.snapshot = snapshot
+        self.refreshed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return int(self._state.alive.sum())
+
+    @classmethod
+    @no_timeout()
+    def build(cls, session, settle_seconds: float = 0, chunk_size: int = 50_000) -> "ColumnStore":
+        """Load every listing with one streamed scan in id order."""
+        position = _settled_position(session, settle_seconds)
+        dictionaries = {name: _Dictionary([], folded) for name, folded in STRINGS.items()}
+        chunks: Dict[str, List[Any]] = {name: [] for name in FIELDS}
+        columns = [getattr(Property, name) for name in FIELDS]
+        result = session.execute(
+            select(*columns).order_by(Property.id),
+            execution_options={"stream_results": True, "yield_per": chunk_size},
+        )
+        for rows in result.partitions():
+            for name, values in zip(FIELDS, zip(*rows)):
+                chunks[name].append(_encode_column(name, values, dictionaries))
+        arrays = {
+            name: np.concatenate(parts) if parts else np.empty(0, dtype=NUMERIC.get(name, "int32"))
+            for name, parts in chunks.items()
+        }
+        return cls(arrays, dictionaries, position)
+
+    def search(self, query: ColumnQuery, offset: int, limit: int) -> Tuple[List[int], int]:
+        """Ids of one page of matches, in sort order, and the exact match count."""
+        state = self._state
+        arrays = state.arrays
+        mask = state.alive.copy()
+        for column, op, value in query.ranges:
+            mask &= arrays[column] >= value if op == ">=" else arrays[column] <= value
+        for column, value in query.equals:
+            code = self.dictionaries[column].lookup(value)
+            if code < 0:
+                return [], 0
+            mask &= arrays[column] == code
+
+        key, descending = SORTS[query.sort]
+        order = state.perms[key][::-1] if descending else state.perms[key]
+        hits = order[mask[order]]
+        return arrays["id"][hits[offset : offset + limit]].tolist(), int(hits.size)
+
+    def _encode_row(self, values: Mapping[str, Any]) -> Dict[str, Any]:
+        row = {}
+        for name in FIELDS[1:]:
+            value = values[name]
+            if name in STRINGS:
+                row[name] = self.dictionaries[name].encode(value)
+            elif name == "created_at":
+                row[name] = _micros(value)
+            else:
+                row[name] = value
+        return row
+
+    def apply(self, changes: Iterable[Tuple[int, Optional[Mapping[str, Any]]]]) -> None:
+        """Upsert ``(id, values)`` rows, or delete ``(id, None)``; idempotent."""
+        latest = dict(changes)
+        if not latest:
+            return
+        with self._lock:
+            state = self._state
+            arrays = {**state.arrays, "alive": state.alive}
+            ids = arrays["id"]
+            count = len(ids)
+            copied = set()
+
+            def writable(name: str):
+                if name not in copied:
+                    arrays[name] = np.array(arrays[name])
+                    copied.add(name)
+                return arrays[name]
+
+            removed: Dict[str, List[Tuple[Any, int]]] = {key: [] for key in SORT_KEYS}
+            added: Dict[str, List[Tuple[Any, int]]] = {key: [] for key in SORT_KEYS}
+            appended: List[Dict[str, Any]] = []
+            out_of_order = False
+            for pid, values in latest.items():
+                position = int(np.searchsorted(ids, pid))
+                exists = position < count and ids[position] == pid
+                if values is None:
+                    if exists and state.alive[position]:
+                        writable("alive")[position] = False
+                    continue
+                row = self._encode_row(values)
+                if not exists:
+                    appended.append({"id": pid, **row})
+                    out_of_order = out_of_order or position < count
+                    continue
+                for name, value in row.items():
+                    if arrays[name][position] != value:
+                        if name in SORT_KEYS:
+                            removed[name].append((arrays[name][position], position))
+                            added[name].append((value, position))
+                        writable(name)[position] = value
+                if not state.alive[position]:
+                    writable("alive")[position] = True
+
+            alive = arrays.pop("alive")
+            perms = dict(state.perms)
+            if appended:
+                appended.sort(key=lambda row: row["id"])
+                for name in FIELDS:
+                    extra = np.array([row[name] for row in appended], dtype=arrays[name].dtype)
+                    arrays[name] = np.concatenate([arrays[name], extra])
+                alive = np.concatenate([alive, np.ones(len(appended), dtype=bool)])
+                for offset, row in enumerate(appended):
+                    for key in SORT_KEYS:
+                        added[key].append((row[key], count + offset))
+
+            if out_of_order:
+                # An id below the current maximum: restore id order and re-sort
+                order = np.argsort(arrays["id"], kind="stable")
+                arrays = {name: values[order] for name, values in arrays.items()}
+                alive = alive[order]
+                perms = {key: np.argsort(arrays[key], kind="stable") for key in SORT_KEYS}
+            else:
+                for key in SORT_KEYS:
+                    if len(removed[key]) + len(added[key]) > REPOSITION_MAX:
+                        perms[key] = np.argsort(arrays[key], kind="stable")
+                    elif removed[key] or added[key]:
+                        perms[key] = _reposition(perms[key], state.arrays[key], removed[key], added[key])
+
+            self._state = _State(arrays, alive, perms)
+
+    @no_timeout()
+    def catch_up(self, session, settle_seconds: float = 0) -> int:
+        """Replay ``property_changes`` entries after ``position``; returns how many were read.
+
+        Entries younger than ``settle_seconds`` wait for the next call (see
+        change_feed.read_changes). Each changed listing is re-read in its
+        current state, so replaying an entry twice is harmless.
+        """
+        replayed = 0
+        cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+        columns = [getattr(Property, name) for name in FIELDS]
+        while True:
+            entries = session.execute(
+                select(PropertyChange.id, PropertyChange.property_id, PropertyChange.changed_at)
+                .where(PropertyChange.id > self.position)
+                .order_by(PropertyChange.id)
+                .limit(CATCH_UP_BATCH)
+            ).all()
+            settled = list(takewhile(lambda entry: entry.changed_at <= cutoff, entries))
+            if not settled:
+                break
+            pids = list(dict.fromkeys(entry.property_id for entry in settled))
+            rows = {row.id: row._mapping for row in session.execute(select(*columns).where(Property.id.in_(pids)))}
+            self.apply((pid, rows.get(pid)) for pid in pids)
+            self.position = settled[-1].id
+            replayed += len(settled)
+            if len(settled) < CATCH_UP_BATCH:
+                break
+        self.refreshed_at = time.monotonic()
+        return replayed
+
+    def save(self, directory: str) -> str:
+        """Write a snapshot under ``directory`` and point ``CURRENT`` at it; returns its name."""
+        state = self._state
+        name = f"{int(time.time() * 1000)}-{os.getpid()}"
+        path = os.path.join(directory, name)
+        os.makedirs(path)
+        for column, values in state.arrays.items():
+            np.save(os.path.join(path, f"{column}.npy"), values)
+        np.save(os.path.join(path, "alive.npy"), state.alive)
+        for key, perm in state.perms.items():
+            np.save(os.path.join(path, f"perm_{key}.npy"), perm)
+        meta = {
+            "position": self.position,
+            "dictionaries": {column: dictionary.values for column, dictionary in self.dictionaries.items()},
+        }
+        with open(os.path.join(path, "meta.json"), "w") as fh:
+            json.dump(meta, fh)
+
+        pointer = os.path.join(directory, "CURRENT")
+        with open(pointer + ".tmp", "w") as fh:
+            fh.write(name)
+        os.replace(pointer + ".tmp", pointer)
+        _prune_snapshots(directory, keep=(name, self.snapshot))
+        return name
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["ColumnStore"]:
+        """Memory-map the current snapshot, or None if there is none.
+
+        Mapped pages are shared by every worker on the host; rows changed
+        afterwards live in private copies until the next snapshot.
+        """
+        name = current_snapshot(directory)
+        if name is None:
+            return None
+        path = os.path.join(directory, name)
+        with open(os.path.join(path, "meta.json")) as fh:
+            meta = json.load(fh)
+
+        def mapped(filename: str):
+            return np.load(os.path.join(path, f"{filename}.npy"), mmap_mode="r")
+
+        dictionaries = {
+            column: _Dictionary(list(meta["dictionaries"][column]), folded) for column, folded in STRINGS.items()
+        }
+        return cls(
+            {column: mapped(column) for column in FIELDS},
+            dictionaries,
+            meta["position"],
+            alive=mapped("alive"),
+            perms={key: mapped(f"perm_{key}") for key in SORT_KEYS},
+            snapshot=name,
+        )
+
+
+def _encode_column(name: str, values: Sequence[Any], dictionaries: Dict[str, _Dictionary]):
+    if name in STRINGS:
+        encode = dictionaries[name].encode
+        return np.fromiter((encode(value) for value in values), dtype="int32", count=len(values))
+    if name == "created_at":
+        return np.array(values, dtype="datetime64[us]").astype("int64")
+    return np.array(values, dtype=NUMERIC[name])
+
+
+def _settled_position(session, settle_seconds: float) -> int:
+    cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    return session.scalar(select(func.max(PropertyChange.id)).where(PropertyChange.changed_at <= cutoff)) or 0
+
+
+def current_snapshot(directory: str) -> Optional[str]:
+    try:
+        with open(os.path.join(directory, "CURRENT")) as fh:
+            return fh.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _prune_snapshots(directory: str, keep: Sequence[Optional[str]]) -> None:
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.isdir(path) and name not in keep:
+            for filename in os.listdir(path):
+                os.remove(os.path.join(path, filename))
+            os.rmdir(path)
+
+
+def get_store() -> Optional[ColumnStore]:
+    """The app's store, or None while it is still loading.
+
+    The first call starts loading it (from COLUMNAR_SNAPSHOT_DIR when a
+    snapshot exists, else a full scan) in the background. After that,
+    every COLUMNAR_REFRESH_SECONDS a background refresh switches to a
+    newer snapshot if one was written and replays the change log, which
+    brings in other workers' writes.
+    """
+    app = current_app._get_current_object()
+    state = app.extensions["columnar"]
+    store = state["store"]
+    refresh = app.config.get("COLUMNAR_REFRESH_SECONDS", 30)
+    stale = store is not None and refresh and time.monotonic() - store.refreshed_at > refresh
+    if (store is None or stale) and state["lock"].acquire(blocking=False):
+        if store is not None:
+            store.refreshed_at = time.monotonic()  # one refresh at a time
+        threading.Thread(target=_refresh, args=(app, state), daemon=True).start()
+    return store
+
+
+def _refresh(app: Flask, state: Dict[str, Any]) -> None:
+    try:
+        with app.app_context():
+            settle = app.config.get("CHANGE_FEED_SETTLE_SECONDS", 2)
+            directory = app.config.get("COLUMNAR_SNAPSHOT_DIR")
+            store = state["store"]
+            if directory and (store is None or current_snapshot(directory) != store.snapshot):
+                store = ColumnStore.load(directory) or store
+            if store is None:
+                store = ColumnStore.build(db.session, settle)
+            store.catch_up(db.session, settle)
+            db.session.remove()
+            state["store"] = store
+    finally:
+        state["lock"].release()
+
+
+def search(args: Mapping[str, Any], page: int, per_page: int) -> Optional[Tuple[List[int], int]]:
+    """Page ids and exact total for a list_properties request, or None to use SQL.
+
+    ``page`` and ``per_page`` must already be clamped like ``paginate()`` does.
+    """
+    query = parse_query(args)
+    if query is None:
+        return None
+    store = get_store()
+    if store is None:
+        return None
+    return store.search(query, (page - 1) * per_page, per_page)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    changes = session.info.setdefault(_CHANGES, [])
+    for before, after in property_changes(session, FIELDS):
+        changes.append((after["id"], after) if after is not None else (before["id"], None))
+
+
+def _after_commit(session: Session) -> None:
+    changes = session.info.pop(_CHANGES, None)
+    if changes and has_app_context():
+        state = current_app.extensions.get("columnar")
+        if state is not None and state["store"] is not None:
+            state["store"].apply(changes)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_CHANGES, None)
+
+
+_listeners_installed = False
+
+
+def init_columnar(app: Flask) -> None:
+    """Serve eligible list_properties requests from a ColumnStore when COLUMNAR_ENGINE is on."""
+    global _listeners_installed
+    if not app.config.get("COLUMNAR_ENGINE"):
+        return
+    if np is None:
+        raise RuntimeError("COLUMNAR_ENGINE=true requires the 'numpy' package")
+    app.extensions["columnar"] = {"store": None, "lock": threading.Lock()}
+
+    if _listeners_installed:
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
+    _listeners_installed = True
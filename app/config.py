@@ -11,6 +11,90 @@ class Config:
     # Pagination
     PER_PAGE = int(os.getenv("PER_PAGE", "12"))
 
+    # Guardrails: per_page cap, deepest page offset (rows skipped) before
+    # paginate=cursor is required, and a per-statement timeout for request
+    # SELECTs (0 = none)
+    MAX_PER_PAGE = int(os.getenv("MAX_PER_PAGE", "100"))
+    MAX_PAGE_DEPTH = int(os.getenv("MAX_PAGE_DEPTH", "10000"))
+    STATEMENT_TIMEOUT_MS = int(os.getenv("STATEMENT_TIMEOUT_MS", "5000"))
+    # Expensive searches (unindexed q, offsets past EXPENSIVE_OFFSET, facets):
+    # concurrent slots per worker (0 = unlimited), per-client limit (429
+    # beyond it), and seconds to wait for a slot before shedding with 503
+    EXPENSIVE_OFFSET = int(os.getenv("EXPENSIVE_OFFSET", "1000"))
+    EXPENSIVE_QUERY_SLOTS = int(os.getenv("EXPENSIVE_QUERY_SLOTS", "4"))
+    EXPENSIVE_QUERY_PER_CLIENT = int(os.getenv("EXPENSIVE_QUERY_PER_CLIENT", "2"))
+    EXPENSIVE_QUERY_WAIT_SECONDS = float(os.getenv("EXPENSIVE_QUERY_WAIT_SECONDS", "2"))
+
+    # Most ids accepted by /api/properties/batch
+    BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "500"))
+
+    # /api/properties/changes: most log entries per batch, and how old an entry
+    # must be before it is served (covers transactions still in flight)
+    CHANGE_FEED_BATCH = int(os.getenv("CHANGE_FEED_BATCH", "500"))
+    CHANGE_FEED_SETTLE_SECONDS = float(os.getenv("CHANGE_FEED_SETTLE_SECONDS", "2"))
+
+    # Signs the per-search tokens that authorize deleting a saved search.
+    # Unset (or the public SECRET_KEY default) means no tokens are issued or accepted.
+    SAVED_SEARCH_TOKEN_KEY = os.getenv("SAVED_SEARCH_TOKEN_KEY", "")
+
+    # total=approx stops counting matches after this many rows
+    APPROX_TOTAL_CAP = int(os.getenv("APPROX_TOTAL_CAP", "10000"))
+
+    # Rows fetched per server-side cursor round trip in /api/properties/export
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+    # /api/suggest prefix index: include street addresses (the bulk of its
+    # memory) and rebuild it in the background after this many seconds so
+    # other workers' writes show up (0 = only this process's own writes)
+    SUGGEST_ADDRESSES = os.getenv("SUGGEST_ADDRESSES", "true").lower() == "true"
+    SUGGEST_REFRESH_SECONDS = int(os.getenv("SUGGEST_REFRESH_SECONDS", "300"))
+
+    # JSON encoder for responses: auto (orjson, then msgspec), orjson, msgspec or stdlib
+    JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+    # Response cache: memory (per-process LRU+TTL), redis (shared) or none
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_TTL = int(os.getenv("CACHE_TTL", "30"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://127.0.0.1:6379/0")
+    # In-memory NumPy column store for structured list_properties queries (needs numpy).
+    # Snapshots written by `flask columnar-snapshot` are memory-mapped at startup.
+    COLUMNAR_ENGINE = os.getenv("COLUMNAR_ENGINE", "false").lower() == "true"
+    COLUMNAR_SNAPSHOT_DIR = os.getenv("COLUMNAR_SNAPSHOT_DIR", "")
+    COLUMNAR_REFRESH_SECONDS = int(os.getenv("COLUMNAR_REFRESH_SECONDS", "30"))
+
+    # Listing photos served as resized derivatives from an on-disk LRU cache (needs Pillow).
+    # Empty IMAGE_CACHE_DIR means instance/images. Proxy URLs are signed with
+    # IMAGE_PROXY_KEY (required), and originals (and redirects) are only
+    # fetched from IMAGE_ORIGIN_HOSTS.
+    IMAGE_PROXY = os.getenv("IMAGE_PROXY", "false").lower() == "true"
+    IMAGE_PROXY_KEY = os.getenv("IMAGE_PROXY_KEY", "")
+    IMAGE_ORIGIN_HOSTS = [
+        host.strip().lower()
+        for host in os.getenv("IMAGE_ORIGIN_HOSTS", "picsum.photos,fastly.picsum.photos").split(",")
+        if host.strip()
+    ]
+    IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "")
+    IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "512"))
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "4"))
+    IMAGE_FETCH_TIMEOUT = float(os.getenv("IMAGE_FETCH_TIMEOUT", "10"))
+    IMAGE_MAX_SOURCE_MB = int(os.getenv("IMAGE_MAX_SOURCE_MB", "20"))
+
+    # Rendered HTML pages (dropped on every write) and per-listing card fragments
+    # (keyed by id and updated_at, so only evicted by size or TTL)
+    PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "60"))
+    PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "512"))
+    FRAGMENT_CACHE_TTL = int(os.getenv("FRAGMENT_CACHE_TTL", "3600"))
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.getenv("FRAGMENT_CACHE_MAX_ENTRIES", "10000"))
+
+    # Performance instrumentation: Server-Timing header, /metrics, slow-query log
+    PERF_INSTRUMENTATION = os.getenv("PERF_INSTRUMENTATION", "true").lower() == "true"
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+    SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+    # Append /api/properties request paths here for `flask db-advise` (empty: off)
+    QUERY_SHAPE_LOG = os.getenv("QUERY_SHAPE_LOG", "")
+
     # SQLAlchemy
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = os.getenv("SQLALCHEMY_ECHO", "false").lower() == "true"
@@ -43,8 +127,24 @@ class Config:
 
     SQLALCHEMY_DATABASE_URI = _database_url
 
-    # Engine options
+    # Read replicas: comma-separated URLs, bound as replica_0, replica_1, ...
+    # GET/HEAD requests read from one of them; a client that just wrote is
+    # kept on the primary for REPLICA_STICKY_SECONDS.
+    SQLALCHEMY_BINDS = {
+        f"replica_{i}": url.strip()
+        for i, url in enumerate(os.getenv("DATABASE_REPLICA_URLS", "").split(","))
+        if url.strip()
+    }
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+    # Engine options (applied to the primary and every replica)
     SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_pre_ping": True,
-        "pool_recycle": 300,
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "false").lower() == "true",
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "300")),
     }
+    if _database_url not in ("sqlite://", "sqlite:///:memory:"):
+        SQLALCHEMY_ENGINE_OPTIONS.update(
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        )
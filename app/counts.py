@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import String, case, cast, func, literal, select, text
+
+from .extensions import db
+from .models import Property
+
+PRICE_BANDS: List[Tuple[str, int, int]] = [
+    ("<250k", 0, 250_000),
+    ("250k-500k", 250_000, 500_000),
+    ("500k-1m", 500_000, 1_000_000),
+    ("1m-2m", 1_000_000, 2_000_000),
+    ("2m+", 2_000_000, 2**31 - 1),
+]
+
+BEDROOM_BUCKETS = ["0", "1", "2", "3", "4", "5+"]
+
+
+def _price_band():
+    return case(
+        *((Property.price < upper, literal(label)) for label, _, upper in PRICE_BANDS[:-1]),
+        else_=literal(PRICE_BANDS[-1][0]),
+    )
+
+
+def _bedroom_bucket():
+    return case((Property.bedrooms >= 5, literal("5+")), else_=cast(Property.bedrooms, String))
+
+
+# facet name -> (group expression, fixed bucket order or None to sort by count)
+FACETS: Dict[str, Tuple[Any, Any]] = {
+    "property_type": (lambda: Property.property_type, None),
+    "status": (lambda: Property.status, None),
+    "state": (lambda: Property.state, None),
+    "bedrooms": (_bedroom_bucket, BEDROOM_BUCKETS),
+    "price": (_price_band, [label for label, _, _ in PRICE_BANDS]),
+}
+
+
+def parse_facets(value: str) -> List[str]:
+    if value in ("1", "all", "true"):
+        return list(FACETS)
+    return [name for name in (part.strip() for part in value.split(",")) if name in FACETS]
+
+
+def facet_query(query, name: str):
+    """One facet's ``GROUP BY`` over the filtered rows: ``(value, count)`` pairs."""
+    make_expr, _ = FACETS[name]
+    expr = make_expr().label("value")
+    return query.with_entities(expr, func.count()).group_by(expr).order_by(None)
+
+
+def facet_buckets(name: str, rows: Iterable[Tuple[Any, int]]) -> List[Dict[str, Any]]:
+    """Order one facet's counts: fixed bucket order, else by count descending."""
+    _, order = FACETS[name]
+    counts = {str(value): count for value, count in rows}
+    if order is None:
+        buckets = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    else:
+        buckets = [(value, counts[value]) for value in order if value in counts]
+    return [{"value": value, "count": count} for value, count in buckets]
+
+
+def facet_counts(query, names: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Count the filtered rows per bucket, one GROUP BY query per facet."""
+    return {name: facet_buckets(name, facet_query(query, name).all()) for name in names}
+
+
+# Row count from table statistics rather than a scan (MySQL only)
+TABLE_ROWS_SQL = text(
+    "SELECT table_rows FROM information_schema.tables "
+    "WHERE table_schema = DATABASE() AND table_name = 'properties'"
+)
+
+
+def _table_row_estimate() -> int:
+    if db.engine.dialect.name == "mysql":
+        rows = db.session.execute(TABLE_ROWS_SQL).scalar()
+        if rows is not None:
+            return int(rows)
+    return -1
+
+
+def capped_count(query, cap: int):
+    """``SELECT count(*)`` over at most ``cap + 1`` of the rows matching ``query``."""
+    bounded = query.with_entities(Property.id).order_by(None).limit(cap + 1).subquery()
+    return select(func.count()).select_from(bounded)
+
+
+def capped_total(counted: int, cap: int) -> Tuple[int, bool]:
+    """Report a count that reached the cap as an estimate of at least that many."""
+    if counted > cap:
+        return cap, True
+    return counted, False
+
+
+def approx_total(query, unfiltered: bool, cap: int) -> Tuple[int, bool]:
+    """Return ``(total, is_estimate)`` without a full COUNT(*).
+
+    Unfiltered MySQL listings use the table statistics. Anything else counts
+    at most ``cap`` matching rows; a count that reaches the cap is reported
+    as an estimate of at least that many.
+    """
+    if unfiltered:
+        estimate = _table_row_estimate()
+        if estimate >= 0:
+            return estimate, True
+    return capped_total(db.session.execute(capped_count(query, cap)).scalar_one(), cap)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Any, Dict, List
+
+from flask import Flask, current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from .instrumentation import Histogram
+
+REPLICA_PREFIX = "replica_"
+STICKY_COOKIE = "db_primary"
+
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_lock = threading.Lock()
+        self.wait_histogram = Histogram(POOL_WAIT_BUCKETS)
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self.wait_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            with self.wait_lock:
+                self.wait_histogram.observe(time.perf_counter() - started)
+
+
+def _db():
+    # extensions.py imports RoutingSession from here, so look the extension up
+    return current_app.extensions["sqlalchemy"]
+
+
+def replica_engines() -> List[Engine]:
+    return [engine for key, engine in _db().engines.items() if key and key.startswith(REPLICA_PREFIX)]
+
+
+def _use_replica() -> bool:
+    return has_request_context() and g.get("db_replica") is not None
+
+
+def read_engine() -> Engine:
+    """Engine for reads that bypass the session (e.g. streamed exports)."""
+    return g.db_replica if _use_replica() else _db().engine
+
+
+class RoutingSession(Session):
+    """Session that sends GET/HEAD request reads to a read replica.
+
+    Flushes, and any session that has already written in this request, go
+    to the primary. Outside a request (CLI, migrations) everything uses
+    the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get("db_wrote") and _use_replica():
+            return g.db_replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _after_flush(session, flush_context) -> None:
+    session.info["db_wrote"] = True
+
+
+def _before_request() -> None:
+    replicas = replica_engines()
+    sticky = request.cookies.get(STICKY_COOKIE)
+    if replicas and request.method in ("GET", "HEAD") and not sticky:
+        g.db_replica = random.choice(replicas)
+
+
+def _after_request(response):
+    # Read-your-writes: after a write, keep this client on the primary until
+    # replicas have had time to catch up.
+    if _db().session.info.get("db_wrote") and replica_engines():
+        max_age = current_app.config.get("REPLICA_STICKY_SECONDS", 5)
+        response.set_cookie(STICKY_COOKIE, "1", max_age=max_age, httponly=True)
+    return response
+
+
+def pool_metrics() -> List[str]:
+    """Pool gauges and checkout-wait histograms per bind, Prometheus format."""
+    pools: Dict[str, Any] = {key or "primary": engine.pool for key, engine in _db().engines.items()}
+    queue_pools = sorted((name, pool) for name, pool in pools.items() if isinstance(pool, QueuePool))
+    lines: List[str] = []
+    for metric, help_text, read in (
+        ("db_pool_checked_out", "Connections currently checked out.", QueuePool.checkedout),
+        ("db_pool_size", "Configured pool size.", QueuePool.size),
+        ("db_pool_overflow", "Overflow connections in use (negative while below pool size).", QueuePool.overflow),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        for name, pool in queue_pools:
+            lines.append(f'{metric}{{bind="{name}"}} {read(pool)}')
+
+    lines += [
+        "# HELP db_pool_wait_seconds Time spent waiting to check out a connection.",
+        "# TYPE db_pool_wait_seconds histogram",
+    ]
+    for name, pool in queue_pools:
+        if not isinstance(pool, TimedQueuePool):
+            continue
+        with pool.wait_lock:
+            hist = pool.wait_histogram
+            for bound, count in zip(hist.buckets, hist.counts):
+                lines.append(f'db_pool_wait_seconds_bucket{{bind="{name}",le="{bound}"}} {count}')
+            lines.append(f'db_pool_wait_seconds_bucket{{bind="{name}",le="+Inf"}} {hist.total}')
+            lines.append(f'db_pool_wait_seconds_sum{{bind="{name}"}} {hist.sum:.6f}')
+            lines.append(f'db_pool_wait_seconds_count{{bind="{name}"}} {hist.total}')
+            lines.append(f'db_pool_timeouts_total{{bind="{name}"}} {pool.timeouts}')
+    return lines
+
+
+def configure_engines(app: Flask) -> None:
+    """Share the pool settings with replica binds; call before ``db.init_app``.
+
+    Flask-SQLAlchemy only applies SQLALCHEMY_ENGINE_OPTIONS to the primary,
+    so URL-only binds are expanded with the same options. Sized pools use
+    TimedQueuePool.
+    """
+    options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    if "pool_size" in options:
+        options.setdefault("poolclass", TimedQueuePool)
+    binds = app.config.setdefault("SQLALCHEMY_BINDS", {})
+    for key, value in list(binds.items()):
+        if key and key.startswith(REPLICA_PREFIX) and not isinstance(value, dict):
+            binds[key] = {**options, "url": value}
+
+
+_listeners_installed = False
+
+
+def init_db_routing(app: Flask) -> None:
+    """Route request reads to replicas and report pool metrics.
+
+    Replicas come from DATABASE_REPLICA_URLS (see Config) as
+    ``replica_N`` binds. Without any, reads stay on the primary and only
+    the pool metrics are added.
+    """
+    global _listeners_installed
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.extensions["perf_metrics"].collectors.append(pool_metrics)
+
+    if not _listeners_installed:
+        event.listen(RoutingSession, "after_flush", _after_flush)
+        _listeners_installed = True
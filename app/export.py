@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from sqlalchemy import select
+
+from .db_routing import read_engine
+from .extensions import db
+from .models import PropertyImage
+from .projections import LIST_COLUMNS, RowSerializer
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+CSV_FIELDS = [column.key for column in LIST_COLUMNS] + ["image_urls"]
+
+_serialize = RowSerializer(LIST_COLUMNS, cover=False)
+
+
+def _images_for(ids: Sequence[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Load the images of one chunk of properties with a single IN query."""
+    by_property: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    rows = db.session.execute(
+        select(PropertyImage.property_id, PropertyImage.url, PropertyImage.is_primary)
+        .where(PropertyImage.property_id.in_(ids))
+        .order_by(PropertyImage.property_id, PropertyImage.id)
+    )
+    for property_id, url, is_primary in rows:
+        by_property[property_id].append({"url": url, "is_primary": is_primary})
+    return by_property
+
+
+def iter_chunks(statement, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield property dicts (with ``images``) in chunks from a server-side cursor.
+
+    The main scan runs on its own connection: an unbuffered MySQL result
+    can't share a connection with the per-chunk image queries.
+    """
+    with read_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(statement)
+        for rows in result.partitions():
+            items = [_serialize(row) for row in rows]
+            images = _images_for([item["id"] for item in items])
+            for item in items:
+                item["images"] = images.get(item["id"], [])
+            yield items
+
+
+def ndjson_lines(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    for items in chunks:
+        yield "".join(json.dumps(item, separators=(",", ":")) + "\n" for item in items)
+
+
+def csv_lines(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for items in chunks:
+        for item in items:
+            item["image_urls"] = " ".join(image["url"] for image in item["images"])
+            writer.writerow(item)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzipped(parts: Iterable[str]) -> Iterator[bytes]:
+    """Gzip a stream incrementally, flushing after each chunk."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for part in parts:
+        data = compressor.compress(part.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
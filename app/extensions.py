@@ -3,7 +3,23 @@ from __future__ import annotations
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
+from .db_routing import RoutingSession
+
+
+def _include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Hide hand-written full-text objects from autogenerate.
+
+    The SQLite FTS5 table (plus its shadow tables) and the MySQL FULLTEXT
+    index are created by migration only, so they have no model counterpart.
+    """
+    if type_ == "table" and name.startswith("properties_fts"):
+        return False
+    if type_ == "index" and name == "ft_properties_search":
+        return False
+    return True
+
+
 # Global extension instances
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+migrate = Migrate(include_object=_include_object)
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from flask import Flask
+from sqlalchemy import Float, and_, event, func, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from .fulltext import apply_text_search
+from .geo import EARTH_RADIUS_KM, BBox, cell_ranges, haversine_km, parse_bbox, parse_point, radius_bbox
+from .models import Property
+
+# Query-string keys filter_properties() reads
+FILTER_PARAMS = (
+    "q",
+    "min_price",
+    "max_price",
+    "min_bed",
+    "max_bed",
+    "min_bath",
+    "max_bath",
+    "city",
+    "state",
+    "zipcode",
+    "type",
+    "bbox",
+    "near",
+)
+
+DEFAULT_RADIUS_KM = 25.0
+# The flat-earth distance used in SQL drifts beyond a few hundred km
+MAX_RADIUS_KM = 500.0
+
+
+def int_arg(args: Mapping[str, Any], name: str) -> Optional[int]:
+    try:
+        return int(args.get(name)) if args.get(name) is not None else None
+    except ValueError:
+        return None
+
+
+def float_arg(args: Mapping[str, Any], name: str) -> Optional[float]:
+    try:
+        return float(args.get(name)) if args.get(name) is not None else None
+    except ValueError:
+        return None
+
+
+def within_bbox(bbox: BBox):
+    """Bounding-box predicate that range-scans the geo_cell index first."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if min_lon <= max_lon:
+        lon_clause = Property.longitude.between(min_lon, max_lon)
+    else:
+        lon_clause = or_(Property.longitude >= min_lon, Property.longitude <= max_lon)
+    return and_(
+        or_(*(Property.geo_cell.between(lo, hi) for lo, hi in cell_ranges(bbox))),
+        Property.latitude.between(min_lat, max_lat),
+        lon_clause,
+    )
+
+
+class great_circle_km(FunctionElement):
+    """Haversine distance in km between two lat/lon pairs, as SQL.
+
+    Compiled to the trig formula where the database has the functions
+    (MySQL), and to a ``haversine_km()`` function registered on every
+    SQLite connection, since SQLite's math functions are a build option.
+    """
+
+    type = Float()
+    name = "great_circle_km"
+    inherit_cache = True
+
+
+@compiles(great_circle_km)
+def _compile_great_circle(element, compiler, **kw):
+    lat1, lon1, lat2, lon2 = (func.radians(arg) for arg in element.clauses)
+    a = func.pow(func.sin((lat2 - lat1) / 2), 2) + func.cos(lat1) * func.cos(lat2) * func.pow(
+        func.sin((lon2 - lon1) / 2), 2
+    )
+    return compiler.process(2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a))), **kw)
+
+
+@compiles(great_circle_km, "sqlite")
+def _compile_great_circle_sqlite(element, compiler, **kw):
+    return f"haversine_km({compiler.process(element.clauses, **kw)})"
+
+
+def _register_sqlite_functions(dbapi_connection, connection_record) -> None:
+    create_function = getattr(dbapi_connection, "create_function", None)
+    if create_function is not None:
+        create_function("haversine_km", 4, _sqlite_haversine_km, deterministic=True)
+
+
+def _sqlite_haversine_km(lat1, lon1, lat2, lon2) -> Optional[float]:
+    if None in (lat1, lon1, lat2, lon2):
+        return None
+    return haversine_km(lat1, lon1, lat2, lon2)
+
+
+def has_filters(args: Mapping[str, Any]) -> bool:
+    return any(args.get(name) for name in FILTER_PARAMS)
+
+
+def filter_properties(query, args: Mapping[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+    """Apply the search filters shared by every listing endpoint.
+
+    Understands ``q``, the min/max price, bed and bath bounds, ``city``,
+    ``state``, ``zipcode``, ``type``, ``bbox`` and ``near``/``radius_km``.
+    Returns the filtered query plus the extra orderings the filters make
+    possible, keyed by sort name (``relevance``, ``distance``).
+    """
+    orderings: Dict[str, Any] = {}
+    text = (args.get("q") or "").strip()
+    if text:
+        query, relevance = apply_text_search(query, text)
+        if relevance is not None:
+            orderings["relevance"] = relevance
+
+    min_price, max_price = int_arg(args, "min_price"), int_arg(args, "max_price")
+    if min_price is not None:
+        query = query.filter(Property.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Property.price <= max_price)
+
+    min_bed, max_bed = int_arg(args, "min_bed"), int_arg(args, "max_bed")
+    if min_bed is not None:
+        query = query.filter(Property.bedrooms >= min_bed)
+    if max_bed is not None:
+        query = query.filter(Property.bedrooms <= max_bed)
+
+    min_bath, max_bath = float_arg(args, "min_bath"), float_arg(args, "max_bath")
+    if min_bath is not None:
+        query = query.filter(Property.bathrooms >= min_bath)
+    if max_bath is not None:
+        query = query.filter(Property.bathrooms <= max_bath)
+
+    if args.get("city"):
+        query = query.filter(Property.city.ilike(args.get("city")))
+    if args.get("state"):
+        query = query.filter(Property.state.ilike(args.get("state")))
+    if args.get("zipcode"):
+        query = query.filter(Property.zipcode.ilike(args.get("zipcode")))
+
+    if args.get("type"):
+        query = query.filter(Property.property_type == args.get("type"))
+
+    bbox = parse_bbox(args.get("bbox"))
+    if bbox is not None:
+        query = query.filter(within_bbox(bbox))
+
+    point = parse_point(args.get("near"))
+    if point is not None:
+        lat, lon = point
+        radius = float_arg(args, "radius_km")
+        if radius is None or radius <= 0:
+            radius = DEFAULT_RADIUS_KM
+        radius = min(radius, MAX_RADIUS_KM)
+        # The box narrows candidates through the geo_cell index; the exact
+        # distance is only computed for rows inside it
+        distance = great_circle_km(Property.latitude, Property.longitude, lat, lon)
+        query = query.filter(within_bbox(radius_bbox(lat, lon, radius)), distance <= radius)
+        orderings["distance"] = distance.asc()
+
+    return query, orderings
+
+
+_listeners_installed = False
+
+
+def init_filters(app: Flask) -> None:
+    """Register the SQL functions the filters need on new SQLite connections."""
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Engine, "connect", _register_sqlite_functions)
+        _listeners_installed = True
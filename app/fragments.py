@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Iterable, List, Sequence
+
+from flask import Flask, current_app
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .cache import get_cache
+from .models import Property, PropertyImage
+from .projections import CARD_COLUMNS, with_projection
+
+CARD_TEMPLATE = "_card.html"
+
+
+def card_key(property_id: int, updated_at: datetime) -> str:
+    """Cards are keyed by row version, so a write never has to find and drop them."""
+    return f"card|{property_id}|{updated_at.isoformat()}"
+
+
+def render_cards(versions: Sequence[Any]) -> List[Markup]:
+    """Card HTML for ``(id, updated_at)`` rows, in order.
+
+    Cached cards are reused as-is. The rest are loaded in one query with
+    the card columns and cover image, rendered, and cached.
+    """
+    cache = get_cache("fragment_cache")
+    keys = [card_key(row.id, row.updated_at) for row in versions]
+    found = cache.get_many(keys)
+
+    missing = {row.id: key for row, key in zip(versions, keys) if key not in found}
+    if missing:
+        template = current_app.jinja_env.get_template(CARD_TEMPLATE)
+        rows = with_projection(Property.query.filter(Property.id.in_(missing)), CARD_COLUMNS)
+        for row in rows:
+            html = template.render(p=row)
+            found[missing[row.id]] = html
+            cache.set(missing[row.id], html)
+    # A card whose row was deleted since the page query is left out
+    return [Markup(found[key]) for key in keys if key in found]
+
+
+def _touch_parents(session: Session, flush_context, instances: Iterable[Any]) -> None:
+    """Bump ``Property.updated_at`` when its images change, so its card key changes too."""
+    now = datetime.utcnow()
+    for image in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(image, PropertyImage):
+            continue
+        parent = image.property or (image.property_id and session.get(Property, image.property_id))
+        if parent is not None and parent not in session.new and parent not in session.deleted:
+            parent.updated_at = now
+
+
+_listeners_installed = False
+
+
+def init_fragments(app: Flask) -> None:
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Session, "before_flush", _touch_parents)
+        _listeners_installed = True
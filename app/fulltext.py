@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import column, or_, select, table, text
+from sqlalchemy.dialects.mysql import match
+
+from .extensions import db
+from .models import Property
+
+# Columns covered by the MySQL FULLTEXT index and the SQLite FTS5 table.
+# Keep in sync with the full-text migration.
+SEARCH_COLUMNS = ("title", "city", "state", "zipcode", "address_line")
+
+FTS_TABLE = "properties_fts"
+MYSQL_INDEX = "ft_properties_search"
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+# engine url -> "mysql" | "sqlite" | None, probed once per process
+_backends: Dict[str, Optional[str]] = {}
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+
+def _tokens(value: str) -> List[str]:
+    return _TOKEN_RE.findall(value.lower())
+
+
+def fulltext_backend() -> Optional[str]:
+    """Return which full-text index is available on the current engine, if any."""
+    engine = db.engine
+    key = str(engine.url)
+    if key not in _backends:
+        _backends[key] = _probe(engine)
+    return _backends[key]
+
+
+def fulltext_probed() -> bool:
+    """Whether ``fulltext_backend`` will answer without a query."""
+    return str(db.engine.url) in _backends
+
+
+def _probe(engine) -> Optional[str]:
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        if dialect == "sqlite":
+            found = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE},
+            ).first()
+            return "sqlite" if found else None
+        if dialect == "mysql":
+            found = conn.execute(
+                text(
+                    "SELECT 1 FROM information_schema.statistics "
+                    "WHERE table_schema = DATABASE() AND table_name = 'properties' "
+                    "AND index_name = :name LIMIT 1"
+                ),
+                {"name": MYSQL_INDEX},
+            ).first()
+            return "mysql" if found else None
+    return None
+
+
+def uses_index(value: str) -> bool:
+    """Whether ``apply_text_search(value)`` is served by a full-text index rather than an ILIKE scan."""
+    return bool(_tokens(value)) and fulltext_backend() is not None
+
+
+def _ilike(query, value: str):
+    like = f"%{value}%"
+    return query.filter(or_(*(getattr(Property, name).ilike(like) for name in SEARCH_COLUMNS)))
+
+
+def apply_text_search(query, value: str) -> Tuple[Any, Optional[Any]]:
+    """Filter ``query`` by free text, returning it with a relevance ORDER BY clause.
+
+    Uses the full-text index when one exists, matching every word as a prefix.
+    Without an index (or with no indexable words) this falls back to the
+    original ILIKE scan and the returned ordering is ``None``.
+    """
+    words = _tokens(value)
+    backend = fulltext_backend() if words else None
+
+    if backend == "sqlite":
+        expr = " ".join(f'"{w}"*' for w in words)
+        hits = (
+            select(_fts.c.rowid.label("id"), _fts.c.rank.label("rank"))
+            .where(text(f"{FTS_TABLE} MATCH :fts_query").bindparams(fts_query=expr))
+            .subquery("fts_hits")
+        )
+        query = query.join(hits, hits.c.id == Property.id)
+        # FTS5 rank is bm25(), where lower means more relevant
+        return query, hits.c.rank.asc()
+
+    if backend == "mysql":
+        expr = " ".join(f"+{w}*" for w in words)
+        relevance = match(*(getattr(Property, name) for name in SEARCH_COLUMNS), against=expr).in_boolean_mode()
+        return query.filter(relevance), relevance.desc()
+
+    return _ilike(query, value), None
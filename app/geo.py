@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import math
+from typing import List, Optional, Tuple
+
+# Fixed grid over the globe, stored per property as properties.geo_cell.
+# Cells are numbered row-major (latitude rows, longitude columns), so the
+# cells of one row inside a viewport form a contiguous integer range.
+CELL_DEG = 0.25
+LAT_CELLS = int(180 / CELL_DEG)
+LON_CELLS = int(360 / CELL_DEG)
+
+# Past this many latitude rows a viewport is scanned as one coarse range
+# instead of OR-ing a range per row.
+MAX_CELL_RANGES = 32
+
+EARTH_RADIUS_KM = 6371.0088
+
+BBox = Tuple[float, float, float, float]  # min_lon, min_lat, max_lon, max_lat
+
+
+def _lat_row(lat: float) -> int:
+    return min(max(int((lat + 90) // CELL_DEG), 0), LAT_CELLS - 1)
+
+
+def _lon_col(lon: float) -> int:
+    return min(max(int((lon + 180) // CELL_DEG), 0), LON_CELLS - 1)
+
+
+def cell_for(lat: Optional[float], lon: Optional[float]) -> Optional[int]:
+    if lat is None or lon is None:
+        return None
+    return _lat_row(lat) * LON_CELLS + _lon_col(lon)
+
+
+def cell_ranges(bbox: BBox) -> List[Tuple[int, int]]:
+    """Inclusive geo_cell ranges covering ``bbox``.
+
+    A box whose min_lon exceeds its max_lon crosses the antimeridian and is
+    covered as two boxes.
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if min_lon > max_lon:
+        return cell_ranges((min_lon, min_lat, 180.0, max_lat)) + cell_ranges((-180.0, min_lat, max_lon, max_lat))
+
+    first_row, last_row = _lat_row(min_lat), _lat_row(max_lat)
+    first_col, last_col = _lon_col(min_lon), _lon_col(max_lon)
+    if last_row - first_row + 1 > MAX_CELL_RANGES:
+        return [(first_row * LON_CELLS + first_col, last_row * LON_CELLS + last_col)]
+    return [
+        (row * LON_CELLS + first_col, row * LON_CELLS + last_col)
+        for row in range(first_row, last_row + 1)
+    ]
+
+
+def parse_bbox(value: Optional[str]) -> Optional[BBox]:
+    """Parse ``min_lon,min_lat,max_lon,max_lat``; ``None`` if malformed."""
+    if not value:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(","))
+    except ValueError:
+        return None
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        return None
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def parse_point(value: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Parse ``lat,lon``; ``None`` if malformed."""
+    if not value:
+        return None
+    try:
+        lat, lon = (float(part) for part in value.split(","))
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def radius_bbox(lat: float, lon: float, radius_km: float) -> BBox:
+    """Smallest lat/lon box containing a great circle of ``radius_km``.
+
+    A circle reaching a pole spans every longitude. Otherwise the widest
+    longitude offset is ``asin(sin(r) / cos(lat))`` for angular radius r,
+    which is wider than ``r / cos(lat)`` at high latitudes.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angle)
+    if abs(lat) + dlat >= 90:
+        return -180.0, max(lat - dlat, -90.0), 180.0, min(lat + dlat, 90.0)
+    dlon = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat)))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if dlon >= 180.0:
+        min_lon, max_lon = -180.0, 180.0
+    else:
+        # Wrap so a box over the antimeridian comes out as min_lon > max_lon
+        min_lon = (min_lon + 540) % 360 - 180
+        max_lon = (max_lon + 540) % 360 - 180
+    return min_lon, max(lat - dlat, -90.0), max_lon, min(lat + dlat, 90.0)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from flask import Flask, current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from .filters import int_arg
+from .fulltext import uses_index
+
+# Endpoints whose statements may legitimately run long (streamed exports)
+UNBOUNDED_ENDPOINTS = {"properties.export_properties"}
+
+# SQLite calls the progress handler every this many VM instructions
+SQLITE_PROGRESS_STEPS = 10_000
+# MySQL error raised when MAX_EXECUTION_TIME interrupts a SELECT
+MYSQL_TIMEOUT_ERROR = 3024
+
+_SELECT_RE = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+_unbounded: ContextVar[bool] = ContextVar("statement_timeout_unbounded", default=False)
+
+
+class PagingError(ValueError):
+    """Raised for a page past MAX_PAGE_DEPTH."""
+
+
+def page_args(args: Mapping[str, Any], paged: bool = True) -> Tuple[int, int]:
+    """``(page, per_page)`` from the query string, clamped to sane values.
+
+    Missing, non-numeric or non-positive values fall back to page 1 and
+    PER_PAGE; ``per_page`` is capped at MAX_PER_PAGE. With ``paged`` (i.e.
+    not cursor mode), a page that would skip more than MAX_PAGE_DEPTH rows
+    raises PagingError: OFFSET reads and discards every skipped row.
+    """
+    config = current_app.config
+    page = int_arg(args, "page") or 1
+    per_page = int_arg(args, "per_page") or 0
+    page = max(page, 1)
+    per_page = min(per_page if per_page >= 1 else config.get("PER_PAGE", 12), config.get("MAX_PER_PAGE", 100))
+    depth = config.get("MAX_PAGE_DEPTH", 10_000)
+    if paged and (page - 1) * per_page > depth:
+        raise PagingError(f"page is too deep (over {depth} rows); use paginate=cursor")
+    return page, per_page
+
+
+def expensive_reasons(args: Mapping[str, Any]) -> List[str]:
+    """Why a list request is costly for the database; empty for cheap ones.
+
+    Text search without a full-text index scans with ILIKE, deep offsets
+    read every skipped row, and facets group the whole filtered set.
+    """
+    reasons = []
+    if args.get("q") and not uses_index(args["q"]):
+        reasons.append("unindexed_q")
+    if args.get("cursor") is None and args.get("paginate") != "cursor":
+        try:
+            page, per_page = page_args(args)
+        except PagingError:
+            page, per_page = 1, 0  # rejected by the view anyway
+        if (page - 1) * per_page >= current_app.config.get("EXPENSIVE_OFFSET", 1000):
+            reasons.append("deep_offset")
+    if args.get("facets"):
+        reasons.append("facets")
+    return reasons
+
+
+class ConcurrencyLimiter:
+    """Bounds how many expensive requests a worker runs at once.
+
+    At most ``slots`` run together; others wait up to ``wait`` seconds for
+    a slot and are then shed with 503. One client may hold at most
+    ``per_client`` running or waiting requests; beyond that it gets 429,
+    so a single client can't fill the queue for everyone else.
+    """
+
+    def __init__(self, slots: int, per_client: int, wait: float) -> None:
+        self.slots = slots
+        self.per_client = per_client
+        self.wait = wait
+        self._semaphore = threading.BoundedSemaphore(slots)
+        self._lock = threading.Lock()
+        self._clients: Dict[str, int] = {}
+        self.running = 0
+        self.shed = {429: 0, 503: 0}
+
+    def acquire(self, client: str, wait: Optional[float] = None) -> Optional[int]:
+        """Take a slot for ``client``; returns None, or the status to shed the request with."""
+        with self._lock:
+            if self._clients.get(client, 0) >= self.per_client:
+                self.shed[429] += 1
+                return 429
+            self._clients[client] = self._clients.get(client, 0) + 1
+        if not self._semaphore.acquire(timeout=self.wait if wait is None else wait):
+            with self._lock:
+                self._leave(client)
+                self.shed[503] += 1
+            return 503
+        with self._lock:
+            self.running += 1
+        return None
+
+    def release(self, client: str) -> None:
+        self._semaphore.release()
+        with self._lock:
+            self.running -= 1
+            self._leave(client)
+
+    def _leave(self, client: str) -> None:
+        if self._clients[client] <= 1:
+            del self._clients[client]
+        else:
+            self._clients[client] -= 1
+
+    def metrics(self) -> List[str]:
+        with self._lock:
+            lines = [
+                "# HELP expensive_requests_running Expensive searches running in this worker.",
+                "# TYPE expensive_requests_running gauge",
+                f"expensive_requests_running {self.running}",
+                "# HELP expensive_requests_shed_total Expensive searches rejected, by status.",
+                "# TYPE expensive_requests_shed_total counter",
+            ]
+            lines += [f'expensive_requests_shed_total{{status="{status}"}} {n}' for status, n in self.shed.items()]
+        return lines
+
+
+SHED_RESPONSES = {
+    429: ("too many concurrent searches from this client", 1),
+    503: ("server busy, retry shortly", 2),
+}
+
+
+def _shed(status: int):
+    message, retry_after = SHED_RESPONSES[status]
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def _enter(wait: Optional[float] = None):
+    """Claim a limiter slot if this request is expensive; a shed response, or None to go ahead."""
+    limiter = current_app.extensions.get("guardrails")
+    if limiter is None or not expensive_reasons(request.args):
+        return None
+    client = request.remote_addr or "-"
+    status = limiter.acquire(client, wait)
+    if status is not None:
+        return _shed(status)
+    g.guardrail_client = client
+    return None
+
+
+def _exit() -> None:
+    client = g.pop("guardrail_client", None)
+    if client is not None:
+        current_app.extensions["guardrails"].release(client)
+
+
+def limit_expensive(view):
+    """Run ``view`` under the expensive-request limiter when the request is expensive.
+
+    Sits below ``cached_response``, so cache hits never take a slot.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        shed = _enter()
+        if shed is not None:
+            return shed
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _exit()
+
+    return wrapper
+
+
+def async_limit_expensive(view):
+    """``limit_expensive`` for coroutine views: sheds at once instead of queueing on the event loop."""
+
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        shed = _enter(wait=0)
+        if shed is not None:
+            return shed
+        try:
+            return await view(*args, **kwargs)
+        finally:
+            _exit()
+
+    return wrapper
+
+
+@contextmanager
+def no_timeout() -> Iterator[None]:
+    """Exempt statements run inside from STATEMENT_TIMEOUT_MS, even during a request.
+
+    For full scans that build in-memory indexes and snapshots: cut short,
+    they would be retried (and time out) on every request. Also usable as
+    a decorator.
+    """
+    token = _unbounded.set(True)
+    try:
+        yield
+    finally:
+        _unbounded.reset(token)
+
+
+def _statement_timeout_ms() -> int:
+    if not has_request_context() or request.endpoint in UNBOUNDED_ENDPOINTS or _unbounded.get():
+        return 0
+    return current_app.config.get("STATEMENT_TIMEOUT_MS", 0)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Bound SELECTs run for a request: a MAX_EXECUTION_TIME hint, or a SQLite progress handler."""
+    timeout = _statement_timeout_ms() if _SELECT_RE.match(statement) else 0
+    dialect = conn.dialect.name
+    if dialect == "mysql" and timeout:
+        statement = _SELECT_RE.sub(f"SELECT /*+ MAX_EXECUTION_TIME({timeout}) */", statement, count=1)
+    elif dialect == "sqlite":
+        dbapi_connection = conn.connection.dbapi_connection
+        set_handler = getattr(dbapi_connection, "set_progress_handler", None)
+        if set_handler is not None and timeout:
+            deadline = time.monotonic() + timeout / 1000
+            set_handler(lambda: time.monotonic() > deadline, SQLITE_PROGRESS_STEPS)
+            conn.info["statement_deadline"] = True
+        elif set_handler is not None and conn.info.pop("statement_deadline", False):
+            set_handler(None, 0)
+    return statement, parameters
+
+
+def is_statement_timeout(exc: OperationalError) -> bool:
+    orig = exc.orig
+    code = orig.args[0] if getattr(orig, "args", None) else None
+    return code == MYSQL_TIMEOUT_ERROR or str(orig) == "interrupted"
+
+
+def _timeout_response(exc: OperationalError):
+    if not is_statement_timeout(exc):
+        raise exc
+    current_app.logger.warning("statement timeout on %s: %s", request.path, exc.statement)
+    response = jsonify({"error": "query took too long; narrow the filters"})
+    response.status_code = 503
+    return response
+
+
+_listeners_installed = False
+
+
+def init_guardrails(app: Flask) -> None:
+    """Protect the database from costly requests.
+
+    SELECTs issued while serving a request are cut off after
+    STATEMENT_TIMEOUT_MS (0 disables) and answered with 503, except in
+    UNBOUNDED_ENDPOINTS and under ``no_timeout``. Expensive list
+    searches (see ``expensive_reasons``) share EXPENSIVE_QUERY_SLOTS per
+    worker (0 disables the limiter). Paging limits are applied by the views via ``page_args``.
+    """
+    global _listeners_installed
+    slots = app.config.get("EXPENSIVE_QUERY_SLOTS", 4)
+    if slots > 0:
+        limiter = ConcurrencyLimiter(
+            slots,
+            app.config.get("EXPENSIVE_QUERY_PER_CLIENT", 2),
+            app.config.get("EXPENSIVE_QUERY_WAIT_SECONDS", 2),
+        )
+        app.extensions["guardrails"] = limiter
+        app.extensions["perf_metrics"].collectors.append(limiter.metrics)
+    app.register_error_handler(OperationalError, _timeout_response)
+
+    if not _listeners_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute, retval=True)
+        _listeners_installed = True
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+from flask import Flask, current_app, url_for
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = ImageOps = None
+
+# name -> (width, height, crop). Cards are cropped to fill; the gallery keeps the aspect ratio.
+SIZES: Dict[str, Tuple[int, int, bool]] = {
+    "thumb": (640, 420, True),
+    "detail": (1280, 840, False),
+}
+JPEG_QUALITY = 82
+# Derivative URLs never change for a given source, so browsers may keep them for a year
+MAX_AGE = 365 * 24 * 3600
+
+
+class ImageError(Exception):
+    """Raised when an original can't be fetched or decoded."""
+
+
+class _OriginRedirectHandler(HTTPRedirectHandler):
+    """Follows redirects only to hosts the service may fetch from."""
+
+    def __init__(self, service: "ImageService") -> None:
+        self.service = service
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not self.service.allowed(newurl):
+            raise ImageError(f"redirect to a host not in IMAGE_ORIGIN_HOSTS: {urlsplit(newurl).hostname}")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+class DiskLRU:
+    """Size-bounded file cache under ``root``, evicting least recently used files.
+
+    Recency lives in memory and in file mtimes (bumped on every hit), so a
+    restarted worker rebuilds the same order from a directory scan.
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        os.makedirs(root, exist_ok=True)
+        found = []
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.startswith("."):
+                    continue
+                stat = os.stat(os.path.join(directory, name))
+                found.append((stat.st_mtime, os.path.join(directory, name), stat.st_size))
+        for _, path, size in sorted(found):
+            self._entries[path] = size
+            self._total += size
+        with self._lock:
+            self._evict()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of a cached file, marked as just used; None on a miss."""
+        path = self.path(key)
+        with self._lock:
+            if path not in self._entries:
+                # Another worker may have written it
+                if not os.path.exists(path):
+                    return None
+                self._entries[path] = os.path.getsize(path)
+                self._total += self._entries[path]
+            self._entries.move_to_end(path)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another worker since
+            with self._lock:
+                self._total -= self._entries.pop(path, 0)
+            return None
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        """Write ``data`` atomically under ``key`` and evict down to the size bound."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._total += len(data) - self._entries.pop(path, 0)
+            self._entries[path] = len(data)
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        # The newest file always stays, even if it alone is over the bound
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            oldest, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(oldest)
+            except FileNotFoundError:
+                pass
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+
+def render_derivatives(data: bytes) -> Dict[str, bytes]:
+    """JPEG bytes for every size in SIZES from one decode of the original."""
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            # Let the JPEG decoder downscale by a power of two while staying above the largest size
+            largest = max((width, height) for width, height, _ in SIZES.values())
+            original.draft("RGB", largest)
+            image = ImageOps.exif_transpose(original).convert("RGB")
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        raise ImageError(f"cannot decode image: {exc}") from exc
+
+    rendered = {}
+    for name, (width, height, crop) in SIZES.items():
+        if crop:
+            resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((width, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        rendered[name] = buffer.getvalue()
+    return rendered
+
+
+class ImageService:
+    """Fetches originals once and serves their derivatives from a DiskLRU.
+
+    A source URL is addressed by its HMAC under ``secret``, so only URLs
+    this app handed out can be fetched, and the same digest names its files
+    on disk (``<digest>-<size>.jpg``). Only http(s) URLs on ``origin_hosts``
+    are signed or fetched, redirects included. Misses are rendered in a
+    thread pool; concurrent requests for one source share a single fetch.
+    """
+
+    def __init__(
+        self,
+        secret: str,
+        cache: DiskLRU,
+        origin_hosts: Iterable[str],
+        workers: int = 4,
+        timeout: float = 10,
+        max_source_bytes: int = 20 << 20,
+    ) -> None:
+        self.secret = secret.encode()
+        self.cache = cache
+        self.origin_hosts = frozenset(host.lower() for host in origin_hosts)
+        self._opener = build_opener(_OriginRedirectHandler(self))
+        self.timeout = timeout
+        self.max_source_bytes = max_source_bytes
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="images")
+        # Reentrant: a future that is already done runs its callback in the submitting thread
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Future] = {}
+
+    def digest(self, src: str) -> str:
+        return hmac.new(self.secret, src.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def allowed(self, src: str) -> bool:
+        url = urlsplit(src)
+        return url.scheme in ("http", "https") and (url.hostname or "") in self.origin_hosts
+
+    def verify(self, src: str, digest: str) -> bool:
+        return hmac.compare_digest(self.digest(src), digest)
+
+    def derivative(self, src: str, digest: str, size: str) -> str:
+        """Path of the ``size`` derivative of ``src``, rendering it on a miss."""
+        key = f"{digest}-{size}.jpg"
+        path = self.cache.get(key)
+        if path is not None:
+            return path
+        with self._lock:
+            future = self._pending.get(digest)
+            if future is None:
+                future = self._pool.submit(self._render, src, digest)
+                self._pending[digest] = future
+                future.add_done_callback(lambda _: self._forget(digest))
+        return future.result(timeout=self.timeout * 2)[size]
+
+    def _forget(self, digest: str) -> None:
+        with self._lock:
+            self._pending.pop(digest, None)
+
+    def _render(self, src: str, digest: str) -> Dict[str, str]:
+        rendered = render_derivatives(self._fetch(src))
+        return {name: self.cache.put(f"{digest}-{name}.jpg", data) for name, data in rendered.items()}
+
+    def _fetch(self, src: str) -> bytes:
+        if not self.allowed(src):
+            raise ImageError("only http(s) sources on IMAGE_ORIGIN_HOSTS are fetched")
+        request = Request(src, headers={"User-Agent": "openhomes-images"})
+        try:
+            with self._opener.open(request, timeout=self.timeout) as response:
+                data = response.read(self.max_source_bytes + 1)
+        except OSError as exc:
+            raise ImageError(f"cannot fetch original: {exc}") from exc
+        if len(data) > self.max_source_bytes:
+            raise ImageError("original is too large")
+        return data
+
+
+def derivative_url(src: Optional[str], size: str = "thumb") -> Optional[str]:
+    """URL of a derivative of ``src``; ``src`` itself when the proxy is off or won't fetch it."""
+    service = current_app.extensions.get("images") if src else None
+    if service is None or not service.allowed(src):
+        return src
+    return url_for("images.derivative", size=size, digest=service.digest(src), src=src)
+
+
+def init_images(app: Flask) -> None:
+    """Serve listing photos as cached derivatives when IMAGE_PROXY is on.
+
+    The ``derivative`` template filter and JSON ``cover_image_url`` fall
+    back to the original URLs when it is off.
+    """
+    app.add_template_filter(derivative_url, "derivative")
+    if not app.config.get("IMAGE_PROXY"):
+        return
+    if Image is None:
+        raise RuntimeError("IMAGE_PROXY=true requires the 'Pillow' package")
+    # Whoever knows the key can make the proxy fetch any allowed URL; never fall back to SECRET_KEY
+    if not app.config.get("IMAGE_PROXY_KEY"):
+        raise RuntimeError("IMAGE_PROXY=true requires IMAGE_PROXY_KEY")
+    if not app.config.get("IMAGE_ORIGIN_HOSTS"):
+        raise RuntimeError("IMAGE_PROXY=true requires IMAGE_ORIGIN_HOSTS")
+    root = app.config.get("IMAGE_CACHE_DIR") or os.path.join(app.instance_path, "images")
+    cache = DiskLRU(root, int(app.config.get("IMAGE_CACHE_MAX_MB", 512)) << 20)
+    app.extensions["images"] = ImageService(
+        app.config["IMAGE_PROXY_KEY"],
+        cache,
+        app.config["IMAGE_ORIGIN_HOSTS"],
+        workers=app.config.get("IMAGE_WORKERS", 4),
+        timeout=app.config.get("IMAGE_FETCH_TIMEOUT", 10),
+        max_source_bytes=int(app.config.get("IMAGE_MAX_SOURCE_MB", 20)) << 20,
+    )
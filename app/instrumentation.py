@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import (
+    Flask,
+    before_render_template,
+    current_app,
+    g,
+    has_app_context,
+    has_request_context,
+    request,
+    request_finished,
+    request_started,
+    template_rendered,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("app.perf")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_EXPLAIN_PREFIX = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "mysql": "EXPLAIN ",
+}
+# Longest params repr a slow-query warning carries
+MAX_LOGGED_PARAMS = 2048
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class Metrics:
+    """Per-process counters and histograms rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.queries: Dict[str, int] = {}
+        self.db_seconds: Dict[str, float] = {}
+        self.response_bytes: Dict[str, int] = {}
+        # Extra ``() -> list of lines`` sources appended to render()
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def record(
+        self,
+        endpoint: str,
+        method: str,
+        status: int,
+        seconds: float,
+        queries: int,
+        db_seconds: float,
+        size: int,
+    ) -> None:
+        with self._lock:
+            key = (endpoint, method, f"{status // 100}xx")
+            self.latency.setdefault(key, Histogram()).observe(seconds)
+            self.queries[endpoint] = self.queries.get(endpoint, 0) + queries
+            self.db_seconds[endpoint] = self.db_seconds.get(endpoint, 0.0) + db_seconds
+            self.response_bytes[endpoint] = self.response_bytes.get(endpoint, 0) + size
+
+    def render(self) -> str:
+        lines: List[str] = [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (endpoint, method, status), hist in sorted(self.latency.items()):
+                labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.total}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {hist.sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {hist.total}")
+
+            lines += ["# HELP db_queries_total SQL statements executed by route.", "# TYPE db_queries_total counter"]
+            for endpoint, count in sorted(self.queries.items()):
+                lines.append(f'db_queries_total{{endpoint="{endpoint}"}} {count}')
+
+            lines += ["# HELP db_seconds_total Time spent in SQL by route.", "# TYPE db_seconds_total counter"]
+            for endpoint, seconds in sorted(self.db_seconds.items()):
+                lines.append(f'db_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}')
+
+            lines += [
+                "# HELP http_response_bytes_total Response body bytes by route (streamed bodies excluded).",
+                "# TYPE http_response_bytes_total counter",
+            ]
+            for endpoint, size in sorted(self.response_bytes.items()):
+                lines.append(f'http_response_bytes_total{{endpoint="{endpoint}"}} {size}')
+        for collect in self.collectors:
+            lines += collect()
+        return "\n".join(lines) + "\n"
+
+
+def _perf() -> Optional[Dict[str, Any]]:
+    return g.get("perf") if has_request_context() else None
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Add the wall time of a block to the current request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        perf = _perf()
+        if perf is not None:
+            perf["timings"][name] = perf["timings"].get(name, 0.0) + time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("perf_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["perf_started"].pop()
+    if conn.info.get("perf_explaining"):
+        return
+
+    perf = _perf()
+    if perf is not None:
+        perf["queries"] += 1
+        perf["db"] += elapsed
+
+    if not has_app_context():
+        return
+    threshold = current_app.config.get("SLOW_QUERY_MS")
+    if threshold is None or elapsed * 1000 < threshold:
+        return
+
+    plan = None
+    if current_app.config.get("SLOW_QUERY_EXPLAIN") and not executemany:
+        plan = _explain(conn.engine, statement, parameters)
+    logger.warning(
+        "slow query %.1fms: %s params=%s%s",
+        elapsed * 1000,
+        statement,
+        _loggable_params(parameters, executemany),
+        f"\nplan:\n{plan}" if plan else "",
+    )
+
+
+def _loggable_params(parameters: Any, executemany: bool) -> str:
+    # Bulk inserts carry every row; the count is enough to recognise them
+    if executemany:
+        return f"<{len(parameters)} rows>"
+    text = repr(parameters)
+    if len(text) > MAX_LOGGED_PARAMS:
+        text = f"{text[:MAX_LOGGED_PARAMS]}... ({len(text)} chars)"
+    return text
+
+
+def _handle_error(exception_context) -> None:
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("perf_started"):
+        conn.info["perf_started"].pop()
+
+
+def _explain(engine: Engine, statement: str, parameters) -> Optional[str]:
+    """EXPLAIN a SELECT on a separate connection.
+
+    The original connection may still hold an unbuffered (streamed) result.
+    """
+    prefix = _EXPLAIN_PREFIX.get(engine.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    try:
+        with engine.connect() as conn:
+            conn.info["perf_explaining"] = True
+            try:
+                rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+            finally:
+                conn.info.pop("perf_explaining", None)
+    except Exception as exc:  # never let diagnostics break the request
+        return f"(explain failed: {exc})"
+    return "\n".join(" | ".join(str(col) for col in row) for row in rows)
+
+
+def _render_started(sender, template, context, **extra) -> None:
+    perf = _perf()
+    if perf is not None:
+        perf["render_started"] = time.perf_counter()
+
+
+def _render_finished(sender, template, context, **extra) -> None:
+    perf = _perf()
+    if perf is not None and "render_started" in perf:
+        elapsed = time.perf_counter() - perf.pop("render_started")
+        perf["timings"]["render"] = perf["timings"].get("render", 0.0) + elapsed
+
+
+def _request_started(sender, **extra) -> None:
+    g.perf = {"started": time.perf_counter(), "queries": 0, "db": 0.0, "timings": {}}
+
+
+def _request_finished(sender, response, **extra) -> None:
+    perf = _perf()
+    if perf is None:
+        return
+    total = time.perf_counter() - perf["started"]
+
+    parts = [f'db;dur={perf["db"] * 1000:.2f};desc="{perf["queries"]} queries"']
+    parts += [f"{name};dur={seconds * 1000:.2f}" for name, seconds in perf["timings"].items()]
+    parts.append(f"app;dur={total * 1000:.2f}")
+    response.headers["Server-Timing"] = ", ".join(parts)
+    size = 0 if response.is_streamed else (response.calculate_content_length() or 0)
+
+    endpoint = request.endpoint or "unmatched"
+    sender.extensions["perf_metrics"].record(
+        endpoint, request.method, response.status_code, total, perf["queries"], perf["db"], size
+    )
+    logger.debug(
+        "%s %s %s %.1fms queries=%d db=%.1fms size=%d %s",
+        request.method,
+        request.full_path,
+        response.status_code,
+        total * 1000,
+        perf["queries"],
+        perf["db"] * 1000,
+        size,
+        " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in perf["timings"].items()),
+    )
+
+
+_listeners_installed = False
+
+
+def init_instrumentation(app: Flask) -> None:
+    """Hook SQL and request timing into the app when PERF_INSTRUMENTATION is on.
+
+    Records per-request query count, DB time, template render time, any
+    ``timed()`` blocks (JSON encoding reports itself) and response size;
+    reports timings in a ``Server-Timing`` header and aggregates latency
+    histograms for ``/metrics``. Statements slower than SLOW_QUERY_MS are
+    logged with their EXPLAIN plan.
+    """
+    global _listeners_installed
+    app.extensions["perf_metrics"] = Metrics()
+    if not app.config.get("PERF_INSTRUMENTATION", True):
+        return
+
+    request_started.connect(_request_started, app)
+    request_finished.connect(_request_finished, app)
+    before_render_template.connect(_render_started, app)
+    template_rendered.connect(_render_finished, app)
+
+    if not _listeners_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _listeners_installed = True
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime
 from typing import Dict, Any, List
 
-from sqlalchemy import Index, String, Integer, Float, Text, ForeignKey, DateTime, Boolean
+from sqlalchemy import BigInteger, Index, String, Integer, Float, Text, ForeignKey, DateTime, Boolean, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .extensions import db
+from .geo import cell_for
+from .images import derivative_url
 
 
 class Property(db.Model):
@@ -20,7 +23,7 @@ class Property(db.Model):
     state: Mapped[str] = mapped_column(String(20), nullable=False)
     zipcode: Mapped[str] = mapped_column(String(20), nullable=False)
 
-    price: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    price: Mapped[int] = mapped_column(Integer, nullable=False)
     bedrooms: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     bathrooms: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     property_type: Mapped[str] = mapped_column(String(50), nullable=False, default="house")
@@ -30,6 +33,8 @@ class Property(db.Model):
 
     latitude: Mapped[float] = mapped_column(Float, nullable=True)
     longitude: Mapped[float] = mapped_column(Float, nullable=True)
+    # Grid cell of (latitude, longitude); see app/geo.py. Kept in sync below.
+    geo_cell: Mapped[int] = mapped_column(Integer, nullable=True)
 
     year_built: Mapped[int] = mapped_column(Integer, nullable=True)
 
@@ -47,7 +52,17 @@ class Property(db.Model):
 
     __table_args__ = (
         Index("idx_properties_city_state", "city", "state"),
-        Index("idx_properties_created_at", "created_at"),
+        # (sort key, id) pairs back keyset pagination; see app/pagination.py
+        Index("idx_properties_created_at_id", "created_at", "id"),
+        Index("idx_properties_price_id", "price", "id"),
+        # type filter under each sort, range filters checked in-index; from `flask db-advise`
+        Index(
+            "idx_properties_property_type_created_at_bedrooms_price",
+            "property_type", "created_at", "id", "bedrooms", "price",
+        ),
+        Index("idx_properties_property_type_price_bedrooms", "property_type", "price", "id", "bedrooms"),
+        # Viewport/radius queries range-scan cells, then check exact coords in-index
+        Index("idx_properties_geo", "geo_cell", "latitude", "longitude"),
     )
 
     def to_dict(self, include_images: bool = False) -> Dict[str, Any]:
@@ -77,13 +92,19 @@ class Property(db.Model):
             "status": self.status,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
-            "cover_image_url": cover_url,
+            "cover_image_url": derivative_url(cover_url),
         }
         if include_images:
             data["images"] = [img.to_dict() for img in self.images]
         return data
 
 
+@event.listens_for(Property, "before_insert")
+@event.listens_for(Property, "before_update")
+def _set_geo_cell(mapper, connection, target: Property) -> None:
+    target.geo_cell = cell_for(target.latitude, target.longitude)
+
+
 class PropertyImage(db.Model):
     __tablename__ = "property_images"
 
@@ -96,6 +117,11 @@ class PropertyImage(db.Model):
 
     property: Mapped[Property] = relationship(back_populates="images")
 
+    __table_args__ = (
+        # Serves selectin image loads and both cover_image_url probes
+        Index("idx_property_images_property_id_is_primary_id", "property_id", "is_primary", "id"),
+    )
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "id": self.id,
@@ -104,3 +130,117 @@ class PropertyImage(db.Model):
             "is_primary": self.is_primary,
             "created_at": self.created_at.isoformat(),
         }
+
+
+# Market-statistics rollups; maintained by app/stats.py
+class MarketStat(db.Model):
+    """Additive totals for one (state, city, zipcode, property_type, status) group."""
+
+    __tablename__ = "market_stats"
+
+    state: Mapped[str] = mapped_column(String(20), primary_key=True)
+    city: Mapped[str] = mapped_column(String(120), primary_key=True)
+    zipcode: Mapped[str] = mapped_column(String(20), primary_key=True)
+    property_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+    status: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    listings: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    price_sum: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    # Listings with square_feet, and the sum of their price per sqft
+    sqft_listings: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    price_per_sqft_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # Sum of created_at as epoch seconds; average days on market is derived from it
+    listed_at_sum: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class MarketStatBucket(db.Model):
+    """Histogram counts (log-spaced buckets) behind the rollup medians."""
+
+    __tablename__ = "market_stat_buckets"
+
+    state: Mapped[str] = mapped_column(String(20), primary_key=True)
+    city: Mapped[str] = mapped_column(String(120), primary_key=True)
+    zipcode: Mapped[str] = mapped_column(String(20), primary_key=True)
+    property_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+    status: Mapped[str] = mapped_column(String(50), primary_key=True)
+    metric: Mapped[str] = mapped_column(String(20), primary_key=True)
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class PropertyChange(db.Model):
+    """Append-only log of listing writes behind /api/properties/changes; see app/change_feed.py."""
+
+    __tablename__ = "property_changes"
+
+    # Feed position; resume tokens carry the last id a client has seen
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # No foreign key: deletes must stay in the log after the row is gone
+    property_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # insert, update (including image changes), reprice (price changed) or delete
+    kind: Mapped[str] = mapped_column(String(10), nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Resolves ``since=<timestamp>`` to a feed position
+        Index("idx_property_changes_changed_at", "changed_at"),
+    )
+
+
+# Saved-search alerts; matched and queued by app/alerts.py (`flask run-alerts`)
+class SavedSearch(db.Model):
+    __tablename__ = "saved_searches"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    email: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Normalized list_properties filters as JSON; see alerts.parse_filters()
+    filters: Mapped[str] = mapped_column(Text, nullable=False)
+    active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (Index("idx_saved_searches_email", "email"),)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "email": self.email,
+            "filters": json.loads(self.filters),
+            "active": self.active,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+class AlertNotification(db.Model):
+    """Outbox row: one listing to tell one saved search about. A sender sets ``sent_at``."""
+
+    __tablename__ = "alert_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    saved_search_id: Mapped[int] = mapped_column(ForeignKey("saved_searches.id", ondelete="CASCADE"), nullable=False)
+    # No foreign key: the listing may be gone by the time the alert is sent
+    property_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # new or repriced
+    reason: Mapped[str] = mapped_column(String(20), nullable=False)
+    price: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Sender polls unsent rows in order
+        Index("idx_alert_outbox_sent_at_id", "sent_at", "id"),
+        Index("idx_alert_outbox_saved_search_id", "saved_search_id"),
+    )
+
+
+class AlertRun(db.Model):
+    """One `flask run-alerts` batch; the latest ``position`` is where the next run resumes."""
+
+    __tablename__ = "alert_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Last property_changes id processed
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    changes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    notifications: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from .models import Property
+
+# sort name -> (key column, descending?)
+# Every key is paired with Property.id as a tie-breaker so the ordering is total
+# and the seek predicate can resume exactly after the last row of a page.
+SORT_KEYS: Dict[str, Tuple[Any, bool]] = {
+    "newest": (Property.created_at, True),
+    "price_asc": (Property.price, False),
+    "price_desc": (Property.price, True),
+}
+
+
+# Orderings list_properties offers that have no stable key to seek on
+UNSEEKABLE_SORTS = ("relevance", "distance")
+
+
+class CursorError(ValueError):
+    """Raised when a client supplies a cursor we cannot decode or apply."""
+
+
+def cursor_sort(sort: str) -> str:
+    """The keyset sort for ``sort``: unknown names mean ``newest``.
+
+    relevance and distance are rejected rather than quietly replaced, since
+    the caller asked for an order the cursor can't follow.
+    """
+    if sort in UNSEEKABLE_SORTS:
+        raise CursorError(f"sort={sort} is not supported with paginate=cursor; use page-based pagination")
+    return sort if sort in SORT_KEYS else "newest"
+
+
+@dataclass
+class Cursor:
+    sort: str
+    key: Any
+    id: int
+    backwards: bool = False
+
+
+@dataclass
+class KeysetPage:
+    items: List[Any]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+def _dump_key(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _load_key(sort: str, value: Any) -> Any:
+    if sort == "newest":
+        return datetime.fromisoformat(value)
+    if not isinstance(value, int):
+        raise TypeError("price cursor key must be an integer")
+    return value
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    payload = {
+        "s": cursor.sort,
+        "k": _dump_key(cursor.key),
+        "i": cursor.id,
+        "b": 1 if cursor.backwards else 0,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> Cursor:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort = payload["s"]
+        if sort not in SORT_KEYS:
+            raise KeyError(sort)
+        return Cursor(
+            sort=sort,
+            key=_load_key(sort, payload["k"]),
+            id=int(payload["i"]),
+            backwards=bool(payload.get("b")),
+        )
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise CursorError("invalid cursor") from exc
+
+
+def _row_cursor(sort: str, row: Any, backwards: bool) -> str:
+    column, _ = SORT_KEYS[sort]
+    return encode_cursor(Cursor(sort, getattr(row, column.key), row.id, backwards))
+
+
+def keyset_query(query, sort: str, per_page: int, cursor: Optional[Cursor] = None):
+    """Apply the seek predicate, ``(sort key, id)`` ordering and LIMIT to ``query``.
+
+    ``query`` must carry the caller's filters but no ORDER BY; ordering is
+    applied here so it matches the composite indexes. It may select
+    ``Property`` or a column projection that includes the sort key and
+    ``id``. One extra row is fetched to tell whether another page exists.
+    """
+    if cursor is not None and cursor.sort != sort:
+        raise CursorError("cursor was issued for a different sort")
+
+    column, descending = SORT_KEYS[sort]
+    backwards = cursor.backwards if cursor is not None else False
+    # Walking backwards flips the scan direction; rows are re-reversed below.
+    scan_desc = descending != backwards
+
+    if cursor is not None:
+        if scan_desc:
+            seek = or_(column < cursor.key, and_(column == cursor.key, Property.id < cursor.id))
+        else:
+            seek = or_(column > cursor.key, and_(column == cursor.key, Property.id > cursor.id))
+        query = query.filter(seek)
+
+    if scan_desc:
+        query = query.order_by(column.desc(), Property.id.desc())
+    else:
+        query = query.order_by(column.asc(), Property.id.asc())
+    return query.limit(per_page + 1)
+
+
+def keyset_page(rows: List[Any], sort: str, per_page: int, cursor: Optional[Cursor] = None) -> KeysetPage:
+    """Turn the rows fetched by ``keyset_query`` into a page with cursors."""
+    backwards = cursor.backwards if cursor is not None else False
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(items=[], next_cursor=None, prev_cursor=None)
+
+    if backwards:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor is not None
+
+    return KeysetPage(
+        items=rows,
+        next_cursor=_row_cursor(sort, rows[-1], False) if has_next else None,
+        prev_cursor=_row_cursor(sort, rows[0], True) if has_prev else None,
+    )
+
+
+def keyset_paginate(query, sort: str, per_page: int, cursor: Optional[Cursor] = None) -> KeysetPage:
+    """Return one page of ``query`` using a seek predicate instead of OFFSET."""
+    sort = cursor_sort(sort)
+    rows = keyset_query(query, sort, per_page, cursor).all()
+    return keyset_page(rows, sort, per_page, cursor)
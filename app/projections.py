@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import DateTime, false, func, select, true
+
+from .images import derivative_url
+from .models import Property, PropertyImage
+
+# Every scalar column Property.to_dict() emits; list responses keep that shape.
+LIST_COLUMNS = (
+    Property.id,
+    Property.title,
+    Property.address_line,
+    Property.city,
+    Property.state,
+    Property.zipcode,
+    Property.price,
+    Property.bedrooms,
+    Property.bathrooms,
+    Property.property_type,
+    Property.square_feet,
+    Property.lot_size_sqft,
+    Property.latitude,
+    Property.longitude,
+    Property.year_built,
+    Property.description,
+    Property.status,
+    Property.created_at,
+    Property.updated_at,
+)
+
+# What a result card in home.html actually renders.
+CARD_COLUMNS = (
+    Property.id,
+    Property.title,
+    Property.address_line,
+    Property.city,
+    Property.state,
+    Property.zipcode,
+    Property.price,
+    Property.bedrooms,
+    Property.bathrooms,
+    Property.square_feet,
+    Property.created_at,
+)
+
+
+COVER_FIELD = "cover_image_url"
+
+FIELD_COLUMNS: Dict[str, Any] = {column.key: column for column in LIST_COLUMNS}
+
+# Named field sets accepted by ``fields=``
+FIELD_PRESETS: Dict[str, List[str]] = {
+    "card": [column.key for column in CARD_COLUMNS] + [COVER_FIELD],
+}
+
+
+def cover_image_url():
+    """Correlated subqueries picking the same cover as Property.to_dict().
+
+    The primary image wins; otherwise the first image added. Each probe
+    is an equality on (property_id, is_primary) read in id order from
+    idx_property_images_property_id_is_primary_id, so it costs one index
+    seek per row and never sorts; the second runs only without a primary.
+    """
+
+    def first_image(is_primary):
+        return (
+            select(PropertyImage.url)
+            .where(PropertyImage.property_id == Property.id, PropertyImage.is_primary == is_primary)
+            .order_by(PropertyImage.id.asc())
+            .limit(1)
+            .correlate(Property)
+            .scalar_subquery()
+        )
+
+    return func.coalesce(first_image(true()), first_image(false())).label("cover_image_url")
+
+
+def with_projection(query, columns: Sequence[Any] = LIST_COLUMNS, cover: bool = True):
+    """Swap a ``Property`` query's entity for plain columns plus the cover URL.
+
+    Rows come back as lightweight tuples: no identity map, no images loaded.
+    Filters, joins and ordering already on ``query`` are kept.
+    """
+    if cover:
+        return query.with_entities(*columns, cover_image_url())
+    return query.with_entities(*columns)
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """Resolve a ``fields=`` sparse fieldset; ``None`` means every field.
+
+    Accepts column names, ``cover_image_url`` and presets such as ``card``.
+    Unknown names are ignored.
+    """
+    if not value:
+        return None
+    fields: List[str] = []
+    for name in (part.strip() for part in value.split(",")):
+        for field in FIELD_PRESETS.get(name, [name]):
+            if (field in FIELD_COLUMNS or field == COVER_FIELD) and field not in fields:
+                fields.append(field)
+    return fields or None
+
+
+class RowSerializer:
+    """Row -> dict conversion compiled once per column layout.
+
+    Key names, the positions needing ``isoformat()`` and the keys to drop
+    from the output are worked out up front, so per row it is one
+    ``dict(zip())`` plus a couple of index lookups. The cover URL points at
+    its thumbnail derivative when the image proxy is on.
+    """
+
+    def __init__(self, columns: Sequence[Any], cover: bool = True, output: Optional[Iterable[str]] = None) -> None:
+        self.columns = list(columns)
+        self.cover = cover
+        self.keys = [column.key for column in self.columns] + ([COVER_FIELD] if cover else [])
+        self._datetimes = [i for i, column in enumerate(self.columns) if isinstance(column.type, DateTime)]
+        wanted = set(self.keys if output is None else output)
+        self._drop = [key for key in self.keys if key not in wanted]
+
+    @classmethod
+    def for_fields(cls, fields: Optional[List[str]], required: Iterable[str] = ()) -> "RowSerializer":
+        """Serializer selecting ``fields`` plus ``required`` columns, emitting only ``fields``."""
+        if fields is None:
+            return cls(LIST_COLUMNS)
+        names = set(fields) | set(required)
+        columns = [column for key, column in FIELD_COLUMNS.items() if key in names]
+        return cls(columns, cover=COVER_FIELD in fields, output=fields)
+
+    def project(self, query):
+        return with_projection(query, self.columns, self.cover)
+
+    def __call__(self, row: Sequence[Any]) -> Dict[str, Any]:
+        values = list(row)
+        for i in self._datetimes:
+            if values[i] is not None:
+                values[i] = values[i].isoformat()
+        if self.cover and values[-1] is not None:
+            values[-1] = derivative_url(values[-1])
+        data = dict(zip(self.keys, values))
+        for key in self._drop:
+            del data[key]
+        return data
+
+
+# Serializer for full LIST_COLUMNS rows with the cover URL
+row_to_dict = RowSerializer(LIST_COLUMNS)
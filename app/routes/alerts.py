@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import hmac
+import json
+
+from flask import Blueprint, abort, jsonify, request
+
+from ..alerts import AlertError, parse_filters, search_token
+from ..extensions import db
+from ..models import SavedSearch
+
+alerts_bp = Blueprint("alerts", __name__)
+
+
+@alerts_bp.post("/saved-searches")
+def create_saved_search():
+    """Save a filter set to be alerted about.
+
+    JSON body: ``{"email": ..., "filters": {...}}`` where ``filters`` takes
+    the list_properties filter params (min/max price, bed and bath, city,
+    state, zipcode, type, bbox, near/radius_km). ``flask run-alerts``
+    queues an outbox notification when a new or repriced listing matches.
+
+    The response carries a ``token``; it is the only way to delete the
+    search later, so callers must keep it. Without SAVED_SEARCH_TOKEN_KEY
+    the token is null and the search can't be deleted through the API.
+    """
+    body = request.get_json(silent=True) or {}
+    email = str(body.get("email") or "").strip()
+    if "@" not in email or len(email) > 255:
+        return jsonify({"error": "a valid email is required"}), 400
+    if not isinstance(body.get("filters"), dict):
+        return jsonify({"error": "filters must be an object"}), 400
+    try:
+        filters = parse_filters(body["filters"])
+    except AlertError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    search = SavedSearch(email=email, filters=json.dumps(filters, sort_keys=True))
+    db.session.add(search)
+    db.session.commit()
+    return jsonify({**search.to_dict(), "token": search_token(search.id)}), 201
+
+
+@alerts_bp.delete("/saved-searches/<int:search_id>")
+def delete_saved_search(search_id: int):
+    """Delete a saved search; needs the ``token`` query param returned on create."""
+    expected = search_token(search_id)
+    token = request.args.get("token") or ""
+    if expected is None or not hmac.compare_digest(expected.encode(), token.encode()):
+        abort(404)
+    search = SavedSearch.query.get_or_404(search_id)
+    db.session.delete(search)
+    db.session.commit()
+    return "", 204
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from typing import Any, Awaitable, Callable, Dict
+
+from flask import abort, current_app, jsonify, request
+from sqlalchemy import func, select
+
+from ..asgi import async_db
+from ..cache import async_cached_response
+from ..counts import TABLE_ROWS_SQL, capped_count, capped_total, facet_buckets, facet_query, parse_facets
+from ..filters import filter_properties, has_filters
+from ..guardrails import PagingError, async_limit_expensive, page_args
+from ..models import Property, PropertyImage
+from ..pagination import CursorError, cursor_sort, decode_cursor, keyset_page, keyset_query
+from ..projections import RowSerializer, parse_fields, row_to_dict, with_projection
+from .properties import REQUIRED_FIELDS, _items, _sorted
+
+_image_to_dict = RowSerializer(
+    (
+        PropertyImage.id,
+        PropertyImage.property_id,
+        PropertyImage.url,
+        PropertyImage.is_primary,
+        PropertyImage.created_at,
+    ),
+    cover=False,
+)
+
+
+async def _total(query, mode: str) -> Dict[str, Any]:
+    """Async ``properties._total``."""
+    db = async_db()
+    if mode == "exact":
+        return {"total": await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))}
+    if mode == "approx":
+        cap = current_app.config.get("APPROX_TOTAL_CAP", 10_000)
+        if not has_filters(request.args) and db.dialect == "mysql":
+            rows = await db.scalar(TABLE_ROWS_SQL)
+            if rows is not None:
+                return {"total": int(rows), "total_is_estimate": True}
+        total, estimated = capped_total(await db.scalar(capped_count(query, cap)), cap)
+        return {"total": total, "total_is_estimate": estimated}
+    return {"total": None}
+
+
+@async_cached_response
+@async_limit_expensive
+async def list_properties():
+    """Async ``properties.list_properties``: same parameters and response.
+
+    The page rows, the total and each facet run as separate queries on
+    their own connections, concurrently.
+    """
+    args = request.args
+    db = async_db()
+
+    cursor_mode = args.get("cursor") is not None or args.get("paginate") == "cursor"
+    try:
+        page, per_page = page_args(args, paged=not cursor_mode)
+    except PagingError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    query, orderings = filter_properties(Property.query, args)
+
+    facet_names = parse_facets(args["facets"]) if args.get("facets") else []
+    facets = [facet_query(query, name) for name in facet_names]
+
+    serialize = RowSerializer.for_fields(parse_fields(args.get("fields")), required=REQUIRED_FIELDS)
+    query = serialize.project(query)
+
+    cursor_token = args.get("cursor")
+    if cursor_mode:
+        try:
+            cursor = decode_cursor(cursor_token) if cursor_token else None
+            sort = args.get("sort") or (cursor.sort if cursor is not None else "newest")
+            sort = cursor_sort(sort)
+            statement = keyset_query(query, sort, per_page, cursor)
+        except CursorError as exc:
+            return jsonify({"error": str(exc)}), 400
+        rows, total, *facet_rows = await asyncio.gather(
+            db.all(statement), _total(query, args.get("total") or "none"), *map(db.all, facets)
+        )
+        keyset = keyset_page(rows, sort, per_page, cursor)
+        data: Dict[str, Any] = {
+            "items": _items(keyset.items, serialize),
+            "per_page": per_page,
+            "next_cursor": keyset.next_cursor,
+            "prev_cursor": keyset.prev_cursor,
+        }
+    else:
+        statement = _sorted(query, args.get("sort") or "newest", orderings)
+        statement = statement.limit(per_page).offset((page - 1) * per_page)
+        rows, total, *facet_rows = await asyncio.gather(
+            db.all(statement), _total(query, args.get("total") or "exact"), *map(db.all, facets)
+        )
+        data = {"items": _items(rows, serialize), "page": page, "per_page": per_page}
+        data["pages"] = math.ceil(total["total"] / per_page) if total["total"] is not None else None
+
+    data.update(total)
+    if facet_names:
+        data["facets"] = {name: facet_buckets(name, rows) for name, rows in zip(facet_names, facet_rows)}
+    return jsonify(data)
+
+
+@async_cached_response
+async def get_property(property_id: int):
+    """Async ``properties.get_property``; the row and its images load concurrently."""
+    db = async_db()
+    rows, images = await asyncio.gather(
+        db.all(with_projection(Property.query).filter(Property.id == property_id)),
+        db.all(
+            select(*_image_to_dict.columns)
+            .where(PropertyImage.property_id == property_id)
+            .order_by(PropertyImage.id)
+        ),
+    )
+    if not rows:
+        abort(404)
+    data = row_to_dict(rows[0])
+    data["images"] = [_image_to_dict(image) for image in images]
+    response = jsonify(data)
+    response.last_modified = rows[0].updated_at
+    return response
+
+
+# Flask endpoint -> coroutine view served natively by the ASGI app
+ASYNC_VIEWS: Dict[str, Callable[..., Awaitable[Any]]] = {
+    "properties.list_properties": list_properties,
+    "properties.get_property": get_property,
+}
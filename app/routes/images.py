@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from flask import Blueprint, abort, current_app, jsonify, request, send_file
+
+from ..images import MAX_AGE, SIZES, ImageError
+
+images_bp = Blueprint("images", __name__)
+
+
+@images_bp.get("/images/<size>/<digest>.jpg")
+def derivative(size: str, digest: str):
+    """A listing photo resized to ``size`` (thumb or detail), from the on-disk cache.
+
+    ``src`` is the original URL and ``digest`` its signature; both come from
+    ``derivative_url``. The first request for a source fetches it and renders
+    every size, so the gallery and card derivatives cost one download.
+    """
+    service = current_app.extensions.get("images")
+    src = request.args.get("src") or ""
+    if service is None or size not in SIZES or not service.verify(src, digest):
+        abort(404)
+    try:
+        path = service.derivative(src, digest, size)
+    except (ImageError, FutureTimeout) as exc:
+        current_app.logger.warning("image derivative failed for %s: %s", src, exc)
+        response = jsonify({"error": "image unavailable"})
+        response.status_code = 502
+        response.cache_control.max_age = 60
+        return response
+    response = send_file(path, mimetype="image/jpeg", max_age=MAX_AGE, etag=digest + "-" + size)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from flask import Blueprint, current_app
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.get("/metrics")
+def metrics():
+    """Prometheus text exposition of this worker's request metrics."""
+    body = current_app.extensions["perf_metrics"].render()
+    return current_app.response_class(body, mimetype="text/plain; version=0.0.4")
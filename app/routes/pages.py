@@ -1,33 +1,43 @@
 from __future__ import annotations
 
-from flask import Blueprint, render_template, request
+from flask import Blueprint, abort, current_app, render_template, request
 
+from ..cache import cached_page
 from ..extensions import db
+from ..fragments import render_cards
+from ..guardrails import PagingError, page_args
 from ..models import Property
 
 pages_bp = Blueprint("pages", __name__)
 
 
 @pages_bp.get("/")
+@cached_page
 def home():
     """Server-rendered home page with search UI."""
     # Initial load shows recent properties
-    per_page = int(request.args.get("per_page") or 12)
-    page = int(request.args.get("page") or 1)
+    try:
+        page, per_page = page_args(request.args)
+    except PagingError as exc:
+        abort(400, description=str(exc))
 
-    query = Property.query.order_by(Property.created_at.desc())
+    # Only row versions here; render_cards loads full rows for uncached cards
+    query = db.session.query(Property.id, Property.updated_at).order_by(Property.created_at.desc())
 
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
     return render_template(
         "home.html",
-        properties=pagination.items,
+        cards=render_cards(pagination.items),
         pagination=pagination,
         search_params={},
     )
 
 
 @pages_bp.get("/properties/<int:property_id>")
+@cached_page
 def property_detail(property_id: int):
     prop = Property.query.get_or_404(property_id)
-    return render_template("detail.html", property=prop)
+    response = current_app.make_response(render_template("detail.html", property=prop))
+    response.last_modified = prop.updated_at
+    return response
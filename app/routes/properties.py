@@ -1,112 +1,364 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import math
+from typing import Any, Dict, List, Optional
 
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, current_app, stream_with_context
 from sqlalchemy import and_, or_  # noqa: F401
 
+from .. import columnar
+from ..cache import cache_key, cached_response, entry_for, get_cache
+from ..change_feed import FeedError, read_changes, resolve_since
+from ..clusters import MAX_ZOOM, cell_deg, clusters
+from ..counts import approx_total, facet_counts, parse_facets
+from ..export import EXPORT_FORMATS, csv_lines, gzipped, iter_chunks, ndjson_lines
 from ..extensions import db
+from ..filters import filter_properties, has_filters, int_arg
+from ..geo import haversine_km, parse_bbox, parse_point
+from ..guardrails import PagingError, limit_expensive, page_args
 from ..models import Property
+from ..pagination import CursorError, decode_cursor, keyset_paginate
+from ..instrumentation import timed
+from ..projections import LIST_COLUMNS, RowSerializer, parse_fields
+from ..suggest import get_index
 
 api_bp = Blueprint("properties", __name__)
 
+# Always selected: sort keys for cursors, coordinates for distance_km
+REQUIRED_FIELDS = ("id", "created_at", "price", "latitude", "longitude")
+
 
 @api_bp.get("/properties")
+@cached_response
+@limit_expensive
 def list_properties():
     """List/search properties with filters and pagination.
 
     Query params:
-    - q: free text matches title, city, state, zipcode
+    - q: free text matches title, city, state, zipcode, address; uses the
+      full-text index (prefix match per word) when present, else ILIKE
     - min_price, max_price
     - min_bed, max_bed
     - min_bath, max_bath
     - city, state, zipcode
     - type: property_type
-    - sort: price_asc|price_desc|newest
-    - page, per_page
+    - bbox: min_lon,min_lat,max_lon,max_lat (min_lon > max_lon crosses the
+      antimeridian)
+    - near: lat,lon with radius_km (default 25, max 500); adds distance_km
+      to items
+    - sort: price_asc|price_desc|newest|relevance|distance (relevance needs
+      q and the full-text index, distance needs near; otherwise newest).
+      relevance and distance are page-based only: with a cursor they are 400
+    - page, per_page: per_page is capped at MAX_PER_PAGE; pages past
+      MAX_PAGE_DEPTH rows are rejected in favour of paginate=cursor
+    - paginate=cursor: keyset pagination; follow next_cursor/prev_cursor via
+      ``cursor=`` (implies paginate=cursor)
+    - total: exact|approx|none. Defaults to exact for page-based results and
+      none in cursor mode. approx counts at most APPROX_TOTAL_CAP rows (or
+      reads table statistics on unfiltered MySQL listings) and sets
+      ``total_is_estimate``.
+    - facets: comma list of property_type,status,state,bedrooms,price (or
+      ``all``); adds per-bucket counts of the filtered set under ``facets``
+    - fields: comma list of item fields to return (column names,
+      cover_image_url, or the ``card`` preset); default is every field
+
+    Expensive searches (unindexed q, deep offsets, facets) are rate limited
+    per worker and may be answered with 429 or 503; see guardrails.py.
     """
     args = request.args
 
-    page = int(args.get("page") or 1)
-    per_page = int(args.get("per_page") or current_app.config.get("PER_PAGE", 12))
-
-    query = Property.query
-
-    text = (args.get("q") or "").strip()
-    if text:
-        like = f"%{text}%"
-        query = query.filter(
-            or_(
-                Property.title.ilike(like),
-                Property.city.ilike(like),
-                Property.state.ilike(like),
-                Property.zipcode.ilike(like),
-                Property.address_line.ilike(like),
-            )
-        )
-
-    def int_arg(name: str) -> Optional[int]:
-        try:
-            return int(args.get(name)) if args.get(name) is not None else None
-        except ValueError:
-            return None
-
-    def float_arg(name: str) -> Optional[float]:
-        try:
-            return float(args.get(name)) if args.get(name) is not None else None
-        except ValueError:
-            return None
-
-    min_price, max_price = int_arg("min_price"), int_arg("max_price")
-    if min_price is not None:
-        query = query.filter(Property.price >= min_price)
-    if max_price is not None:
-        query = query.filter(Property.price <= max_price)
-
-    min_bed, max_bed = int_arg("min_bed"), int_arg("max_bed")
-    if min_bed is not None:
-        query = query.filter(Property.bedrooms >= min_bed)
-    if max_bed is not None:
-        query = query.filter(Property.bedrooms <= max_bed)
-
-    min_bath, max_bath = float_arg("min_bath"), float_arg("max_bath")
-    if min_bath is not None:
-        query = query.filter(Property.bathrooms >= min_bath)
-    if max_bath is not None:
-        query = query.filter(Property.bathrooms <= max_bath)
-
-    if args.get("city"):
-        query = query.filter(Property.city.ilike(args.get("city")))
-    if args.get("state"):
-        query = query.filter(Property.state.ilike(args.get("state")))
-    if args.get("zipcode"):
-        query = query.filter(Property.zipcode.ilike(args.get("zipcode")))
-
-    if args.get("type"):
-        query = query.filter(Property.property_type == args.get("type"))
-
-    sort = args.get("sort") or "newest"
+    cursor_mode = args.get("cursor") is not None or args.get("paginate") == "cursor"
+    try:
+        page, per_page = page_args(args, paged=not cursor_mode)
+    except PagingError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    if "columnar" in current_app.extensions:
+        response = _columnar_response(args, page, per_page)
+        if response is not None:
+            return response
+
+    query, orderings = filter_properties(Property.query, args)
+
+    extra: Dict[str, Any] = {}
+    if args.get("facets"):
+        extra["facets"] = facet_counts(query, parse_facets(args["facets"]))
+
+    # Result rows are plain column tuples plus one cover URL; see projections.py.
+    serialize = RowSerializer.for_fields(parse_fields(args.get("fields")), required=REQUIRED_FIELDS)
+    query = serialize.project(query)
+
+    cursor_token = args.get("cursor")
+    if cursor_mode:
+        extra.update(_total(query, args.get("total") or "none"))
+        return _cursor_response(query, args.get("sort"), per_page, cursor_token, serialize, extra)
+
+    query = _sorted(query, args.get("sort") or "newest", orderings)
+    total_mode = args.get("total") or "exact"
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False, count=total_mode == "exact")
+
+    data: Dict[str, Any] = {
+        "items": _items(pagination.items, serialize),
+        "page": pagination.page,
+        "pages": pagination.pages,
+        "total": pagination.total,
+        "per_page": pagination.per_page,
+    }
+    if total_mode != "exact":
+        data.update(_total(query, total_mode))
+        data["pages"] = math.ceil(data["total"] / per_page) if data.get("total") is not None else None
+    data.update(extra)
+    return jsonify(data)
+
+
+def _columnar_response(args, page: int, per_page: int):
+    """Page-mode listing from the in-memory column store; None when it can't serve ``args``.
+
+    The store picks the page of ids and the exact total; only those rows are
+    read from the database.
+    """
+    with timed("columnar"):
+        found = columnar.search(args, page, per_page)
+    if found is None:
+        return None
+    ids, total = found
+
+    serialize = RowSerializer.for_fields(parse_fields(args.get("fields")), required=REQUIRED_FIELDS)
+    rows = {row.id: row for row in serialize.project(Property.query.filter(Property.id.in_(ids)))} if ids else {}
+    total_mode = args.get("total") or "exact"
+    data: Dict[str, Any] = {
+        "items": _items([rows[pid] for pid in ids if pid in rows], serialize),
+        "page": page,
+        "pages": math.ceil(total / per_page),
+        "total": total,
+        "per_page": per_page,
+    }
+    if total_mode == "approx":
+        data["total_is_estimate"] = False
+    elif total_mode != "exact":
+        data["total"] = data["pages"] = None
+    return jsonify(data)
+
+
+def _sorted(query, sort: str, orderings: Dict[str, Any]):
+    """ORDER BY for page-based listings."""
     if sort == "price_asc":
-        query = query.order_by(Property.price.asc())
-    elif sort == "price_desc":
-        query = query.order_by(Property.price.desc())
+        return query.order_by(Property.price.asc())
+    if sort == "price_desc":
+        return query.order_by(Property.price.desc())
+    if sort in orderings:
+        return query.order_by(orderings[sort], Property.id.desc())
+    return query.order_by(Property.created_at.desc())
+
+
+def _total(query, mode: str) -> Dict[str, Any]:
+    """Total-count fields for ``total=exact|approx|none``."""
+    if mode == "exact":
+        return {"total": query.order_by(None).count()}
+    if mode == "approx":
+        cap = current_app.config.get("APPROX_TOTAL_CAP", 10_000)
+        total, estimated = approx_total(query, not has_filters(request.args), cap)
+        return {"total": total, "total_is_estimate": estimated}
+    return {"total": None}
+
+
+def _items(rows, serialize: RowSerializer) -> List[Dict[str, Any]]:
+    with timed("serialize"):
+        items = [serialize(row) for row in rows]
+        point = parse_point(request.args.get("near"))
+        if point is not None:
+            for row, item in zip(rows, items):
+                if row.latitude is not None and row.longitude is not None:
+                    item["distance_km"] = round(haversine_km(*point, row.latitude, row.longitude), 3)
+    return items
+
+
+def _cursor_response(
+    query,
+    sort: Optional[str],
+    per_page: int,
+    token: Optional[str],
+    serialize: RowSerializer,
+    extra: Dict[str, Any],
+):
+    try:
+        cursor = decode_cursor(token) if token else None
+        # A bare ``cursor=`` link carries its own sort; an explicit one must agree.
+        sort = sort or (cursor.sort if cursor is not None else "newest")
+        page = keyset_paginate(query, sort, per_page, cursor)
+    except CursorError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    data: Dict[str, Any] = {
+        "items": _items(page.items, serialize),
+        "per_page": per_page,
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }
+    data.update(extra)
+    return jsonify(data)
+
+
+@api_bp.get("/suggest")
+def suggest():
+    """As-you-type completions for the search box.
+
+    Query params:
+    - prefix: what has been typed so far (case and extra spaces ignored)
+    - limit: most suggestions to return (default 10, max 50)
+
+    Suggestions are state, "City, ST", zipcode and "address, City, ST"
+    labels, with exact matches first, then the most listings. Served from
+    an in-memory index (app/suggest.py), not the database; the list is
+    empty while a fresh worker is still building it.
+    """
+    limit = min(max(int_arg(request.args, "limit") or 10, 1), 50)
+    index = get_index()
+    if index is None:
+        return jsonify({"suggestions": []})
+    with timed("suggest"):
+        suggestions = index.suggest(request.args.get("prefix") or "", limit)
+    return jsonify({"suggestions": suggestions})
+
+
+@api_bp.get("/properties/changes")
+def changes_feed():
+    """What changed since a resume token, for incremental sync.
+
+    Query params:
+    - since: the ``next`` token from the previous batch, or an ISO-8601 UTC
+      timestamp to start from; omitted, the feed starts at the beginning
+      (every existing listing appears once as an upsert)
+    - limit: log entries to read (default and max CHANGE_FEED_BATCH)
+    - fields: as for list_properties
+
+    Each listing appears once per batch with its current fields
+    (``op: upsert``) or as ``op: delete``. Keep calling with ``next``
+    while ``has_more`` is true; afterwards, poll with the last ``next``.
+    """
+    cap = current_app.config.get("CHANGE_FEED_BATCH", 500)
+    limit = min(max(int_arg(request.args, "limit") or cap, 1), cap)
+    serialize = RowSerializer.for_fields(parse_fields(request.args.get("fields")), required=("id",))
+    try:
+        position = resolve_since(db.session, request.args.get("since"))
+    except FeedError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    settle = current_app.config.get("CHANGE_FEED_SETTLE_SECONDS", 2)
+    with timed("changes"):
+        batch = read_changes(db.session, position, limit, serialize, settle)
+    return jsonify(batch)
+
+
+@api_bp.get("/properties/export")
+def export_properties():
+    """Stream every property matching the list_properties filters.
+
+    Query params:
+    - the filters accepted by list_properties (paging and sort are ignored;
+      rows come out in id order)
+    - format: ndjson (default, one object per line with its images) or csv
+
+    The response is gzip-encoded when the client accepts it.
+    """
+    fmt = request.args.get("format") or "ndjson"
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"unsupported format {fmt!r}"}), 400
+
+    query, _ = filter_properties(Property.query, request.args)
+    statement = query.with_entities(*LIST_COLUMNS).order_by(Property.id).statement
+    chunks = iter_chunks(statement, current_app.config.get("EXPORT_CHUNK_SIZE", 1000))
+    body = ndjson_lines(chunks) if fmt == "ndjson" else csv_lines(chunks)
+
+    headers = {
+        "Content-Disposition": f"attachment; filename=properties.{fmt}",
+        "Vary": "Accept-Encoding",
+    }
+    if "gzip" in request.accept_encodings:
+        body = gzipped(body)
+        headers["Content-Encoding"] = "gzip"
+
+    return current_app.response_class(
+        stream_with_context(body), mimetype=EXPORT_FORMATS[fmt], headers=headers
+    )
+
+
+@api_bp.get("/properties/clusters")
+@cached_response
+def property_clusters():
+    """Per-cell listing aggregates for a map viewport.
+
+    Query params:
+    - bbox: min_lon,min_lat,max_lon,max_lat (required)
+    - zoom: map zoom level 0-20 (default 10); sets the cell size
+    - any other list_properties filter
+    """
+    if parse_bbox(request.args.get("bbox")) is None:
+        return jsonify({"error": "bbox=min_lon,min_lat,max_lon,max_lat is required"}), 400
+    zoom = int_arg(request.args, "zoom")
+    zoom = min(max(zoom if zoom is not None else 10, 0), MAX_ZOOM)
+
+    query, _ = filter_properties(Property.query, request.args)
+    return jsonify({"zoom": zoom, "cell_deg": cell_deg(zoom), "clusters": clusters(query, zoom)})
+
+
+@api_bp.route("/properties/batch", methods=["GET", "POST"])
+def batch_properties():
+    """Fetch many properties (with images) in one round trip.
+
+    ``ids`` comes as a comma list (``GET ?ids=1,2,3``), or for long lists as
+    a JSON body ``{"ids": [...]}`` or form field on POST. Items follow the
+    requested order, duplicates collapsed; unknown ids are listed under
+    ``missing``. Entries are shared with the get_property cache, so a
+    batch warms single lookups and vice versa.
+    """
+    if request.method == "POST" and request.is_json:
+        raw = (request.get_json(silent=True) or {}).get("ids") or []
     else:
-        query = query.order_by(Property.created_at.desc())
+        source = request.form if request.method == "POST" else request.args
+        raw = [part for value in source.getlist("ids") for part in value.split(",") if part.strip()]
+    try:
+        ids = list(dict.fromkeys(int(value) for value in raw))
+    except (TypeError, ValueError):
+        return jsonify({"error": "ids must be integers"}), 400
+    limit = current_app.config.get("BATCH_MAX_IDS", 500)
+    if len(ids) > limit:
+        return jsonify({"error": f"at most {limit} ids per request"}), 400
+
+    cache = get_cache()
+    generation = cache.generation()
+    keys = {pid: cache_key("properties.get_property", {"property_id": pid}, ()) for pid in ids}
+    cached = cache.get_many(list(keys.values()), generation)
 
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    found: Dict[int, Any] = {}
+    for pid in ids:
+        entry = cached.get(keys[pid])
+        if entry is not None:
+            found[pid] = current_app.json.loads(entry.body)
+
+    misses = [pid for pid in ids if pid not in found]
+    if misses:
+        # One IN query; images arrive via a single selectin query
+        for prop in Property.query.filter(Property.id.in_(misses)):
+            response = _property_response(prop)
+            cache.set(keys[prop.id], entry_for(response), generation)
+            found[prop.id] = prop.to_dict(include_images=True)
 
     return jsonify(
         {
-            "items": [p.to_dict() for p in pagination.items],
-            "page": pagination.page,
-            "pages": pagination.pages,
-            "total": pagination.total,
-            "per_page": pagination.per_page,
+            "items": [found[pid] for pid in ids if pid in found],
+            "missing": [pid for pid in ids if pid not in found],
         }
     )
 
 
+def _property_response(prop: Property):
+    response = jsonify(prop.to_dict(include_images=True))
+    response.last_modified = prop.updated_at
+    return response
+
+
 @api_bp.get("/properties/<int:property_id>")
+@cached_response
 def get_property(property_id: int):
-    prop = Property.query.get_or_404(property_id)
-    return jsonify(prop.to_dict(include_images=True))
+    return _property_response(Property.query.get_or_404(property_id))
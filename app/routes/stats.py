@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from flask import Blueprint, jsonify, request
+
+from ..cache import cached_response
+from ..extensions import db
+from ..filters import int_arg
+from ..stats import FILTERS, GROUP_BY, market_stats
+
+stats_bp = Blueprint("stats", __name__)
+
+
+@stats_bp.get("/stats")
+@cached_response
+def get_stats():
+    """Market statistics from the precomputed rollups.
+
+    Query params:
+    - state, city, zipcode, type: exact-match filters (any combination)
+    - group_by: state|city|zipcode|property_type splits the result into the
+      largest ``limit`` groups (default 50, max 500)
+
+    Each block has listings, active_listings, median/avg price, median/avg
+    price per sqft and avg days on market, overall and ``by_status``.
+    Medians are read from histograms and are accurate to about 2.5%.
+    """
+    filters = {column: request.args[name] for name, column in FILTERS.items() if request.args.get(name)}
+    group_by = request.args.get("group_by") or None
+    if group_by is not None and group_by not in GROUP_BY:
+        return jsonify({"error": f"group_by must be one of {', '.join(GROUP_BY)}"}), 400
+    limit = min(max(int_arg(request.args, "limit") or 50, 1), 500)
+
+    data = market_stats(db.session, filters, group_by, limit)
+    return jsonify({"filters": {name: request.args[name] for name in FILTERS if request.args.get(name)}, **data})
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from faker import Faker
+
+from .geo import cell_for
+
+PROPERTY_TYPES: List[str] = ["house", "condo", "townhouse", "apartment"]
+ADJECTIVES: List[str] = ["Modern", "Cozy", "Spacious", "Charming"]
+STATUSES: List[str] = ["for_sale", "pending", "sold"]
+
+# Faker is by far the slowest part of row generation, so bulk mode draws
+# each text field from a pool generated once per batch instead of per row.
+POOL_SIZE = 500
+
+Rows = List[Dict[str, Any]]
+
+
+def _pools(fake: Faker) -> Dict[str, List[Any]]:
+    return {
+        "city": [fake.city() for _ in range(POOL_SIZE)],
+        "state": [fake.state_abbr() for _ in range(POOL_SIZE)],
+        "street": [fake.street_address() for _ in range(POOL_SIZE)],
+        "zipcode": [fake.postcode() for _ in range(POOL_SIZE)],
+        "description": [fake.paragraph(nb_sentences=4) for _ in range(POOL_SIZE // 5)],
+    }
+
+
+def generate_batch(job: Tuple[int, int, int, Optional[int]]) -> Tuple[Rows, Rows]:
+    """Build property and image rows for ids ``first_id .. first_id + size - 1``.
+
+    ``job`` is ``(batch_index, first_id, size, seed)``. With a seed, each batch
+    is seeded from it and its index, so output does not depend on how batches
+    are spread across worker processes. Runs in pool workers; returns plain
+    dicts ready for ``executemany``.
+    """
+    batch_index, first_id, size, seed = job
+    rng = random.Random(None if seed is None else seed * 1_000_003 + batch_index)
+    fake = Faker()
+    fake.seed_instance(rng.getrandbits(32))
+    pools = _pools(fake)
+
+    properties: Rows = []
+    images: Rows = []
+    for prop_id in range(first_id, first_id + size):
+        bedrooms = rng.randint(1, 6)
+        property_type = rng.choice(PROPERTY_TYPES)
+        latitude = round(rng.uniform(-90, 90), 6)
+        longitude = round(rng.uniform(-180, 180), 6)
+        properties.append(
+            {
+                "id": prop_id,
+                "title": f"{bedrooms}BR {rng.choice(ADJECTIVES)} {rng.choice(PROPERTY_TYPES).title()}",
+                "address_line": rng.choice(pools["street"]),
+                "city": rng.choice(pools["city"]),
+                "state": rng.choice(pools["state"]),
+                "zipcode": rng.choice(pools["zipcode"]),
+                "price": rng.randrange(150_000, 2_500_000, 1000),
+                "bedrooms": bedrooms,
+                "bathrooms": round(rng.uniform(1, 5), 1),
+                "property_type": property_type,
+                "square_feet": rng.randrange(600, 6000, 10),
+                "lot_size_sqft": rng.randrange(1000, 20000, 50),
+                "latitude": latitude,
+                "longitude": longitude,
+                # Core inserts skip the model's before_insert hook
+                "geo_cell": cell_for(latitude, longitude),
+                "year_built": rng.randint(1950, 2023),
+                "description": rng.choice(pools["description"]),
+                "status": rng.choice(STATUSES),
+            }
+        )
+        for j in range(rng.randint(3, 6)):
+            width = rng.choice([640, 720, 800, 960])
+            height = rng.choice([420, 480, 540, 600])
+            images.append(
+                {
+                    "property_id": prop_id,
+                    "url": f"https://picsum.photos/{width}/{height}?random={rng.getrandbits(64):016x}",
+                    "is_primary": j == 0,
+                }
+            )
+    return properties, images
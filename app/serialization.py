@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Optional, Tuple
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+from .instrumentation import timed
+
+JSON_BACKENDS = ("orjson", "msgspec", "stdlib")
+
+
+def _load_backend(name: str, default: Callable[[Any], Any]) -> Optional[Callable[[Any], bytes]]:
+    """Return a compact, key-sorted ``obj -> bytes`` encoder, or None if unavailable.
+
+    Types the fast encoders don't handle the way Flask does (datetimes as
+    HTTP dates, Decimal, UUID, dataclasses) go through ``default``.
+    """
+    if name == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            return None
+        options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        return lambda obj: orjson.dumps(obj, default=default, option=options)
+    if name == "msgspec":
+        try:
+            import msgspec
+        except ImportError:
+            return None
+        return msgspec.json.Encoder(enc_hook=default, order="sorted").encode
+    return None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes responses with orjson or msgspec when installed.
+
+    ``JSON_BACKEND`` picks the encoder: ``auto`` (first available of
+    orjson, msgspec), one of them by name, or ``stdlib`` for Flask's default.
+    Pretty-printed debug output and explicit ``dumps`` keyword arguments
+    always use the stdlib encoder. Encoding time is reported as
+    ``serialize`` in Server-Timing.
+    """
+
+    def __init__(self, app: Flask) -> None:
+        super().__init__(app)
+        self.backend, self._encode = self._select(app.config.get("JSON_BACKEND", "auto"))
+
+    def _select(self, wanted: str) -> Tuple[str, Optional[Callable[[Any], bytes]]]:
+        names = JSON_BACKENDS if wanted == "auto" else (wanted,)
+        for name in names:
+            encode = _load_backend(name, self.default)
+            if encode is not None:
+                return name, encode
+        return "stdlib", None
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        with timed("serialize"):
+            if self._encode is not None and not kwargs:
+                return self._encode(obj).decode()
+            return super().dumps(obj, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        if self._encode is None or pretty:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        with timed("serialize"):
+            body = self._encode(obj) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_serialization(app: Flask) -> None:
+    app.json = FastJSONProvider(app)
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from flask import Flask
+from sqlalchemy import and_, delete, event, func, insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .changes import property_changes
+from .models import MarketStat, MarketStatBucket, Property
+
+# Rollup grain; every listing lands in exactly one group
+GROUP_FIELDS = ("state", "city", "zipcode", "property_type", "status")
+# Property attributes whose change moves a listing's contribution
+TRACKED_FIELDS = GROUP_FIELDS + ("price", "square_feet", "created_at")
+
+TOTAL_FIELDS = ("listings", "price_sum", "sqft_listings", "price_per_sqft_sum", "listed_at_sum")
+
+# Medians come from log-spaced histograms: bucket b covers [RATIO**b, RATIO**(b+1)),
+# so a merged median is within about RATIO/2 - 0.5 (2.5%) of the true value.
+BUCKET_RATIO = 1.05
+_LOG_RATIO = math.log(BUCKET_RATIO)
+
+Key = Tuple[str, ...]
+
+
+def bucket_for(value: float) -> int:
+    return math.floor(math.log(max(value, 1.0)) / _LOG_RATIO)
+
+
+def _epoch(value: datetime) -> int:
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
+class Rollup:
+    """Signed per-group deltas: ``totals[key][field]`` and ``buckets[(key, metric, bucket)]``.
+
+    A rebuild adds every listing once; the write path adds the new version
+    of each changed listing and subtracts the old one.
+    """
+
+    def __init__(self) -> None:
+        self.totals: Dict[Key, Counter] = defaultdict(Counter)
+        self.buckets: Counter = Counter()
+
+    def add(self, values: Dict[str, Any], sign: int = 1) -> None:
+        key = tuple(values[field] for field in GROUP_FIELDS)
+        totals = self.totals[key]
+        price, sqft = values["price"], values["square_feet"]
+        totals["listings"] += sign
+        totals["price_sum"] += sign * price
+        totals["listed_at_sum"] += sign * _epoch(values["created_at"])
+        self.buckets[(key, "price", bucket_for(price))] += sign
+        if sqft:
+            totals["sqft_listings"] += sign
+            totals["price_per_sqft_sum"] += sign * price / sqft
+            self.buckets[(key, "price_per_sqft", bucket_for(price / sqft))] += sign
+
+    def __bool__(self) -> bool:
+        return bool(self.totals)
+
+    def total_rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for key, totals in self.totals.items():
+            if any(totals.values()):
+                rows.append({**dict(zip(GROUP_FIELDS, key)), **{field: totals[field] for field in TOTAL_FIELDS}})
+        return rows
+
+    def bucket_rows(self) -> List[Dict[str, Any]]:
+        return [
+            {**dict(zip(GROUP_FIELDS, key)), "metric": metric, "bucket": bucket, "count": count}
+            for (key, metric, bucket), count in self.buckets.items()
+            if count
+        ]
+
+
+def _upsert_add(conn: Connection, model, columns: Sequence[str], rows: List[Dict[str, Any]]) -> None:
+    """Insert ``rows`` or add their ``columns`` onto the existing rows, atomically."""
+    if not rows:
+        return
+    table = model.__table__
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key],
+            set_={name: table.c[name] + stmt.excluded[name] for name in columns},
+        )
+        conn.execute(stmt, rows)
+    elif dialect == "mysql":
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update({name: table.c[name] + stmt.inserted[name] for name in columns})
+        conn.execute(stmt, rows)
+    else:
+        keys = [column.name for column in table.primary_key]
+        for row in rows:
+            match = and_(*(table.c[name] == row[name] for name in keys))
+            changed = conn.execute(
+                update(table).where(match).values({name: table.c[name] + row[name] for name in columns})
+            )
+            if not changed.rowcount:
+                conn.execute(insert(table), [row])
+
+
+def apply(conn: Connection, rollup: Rollup) -> None:
+    """Add a set of deltas to the rollup tables, dropping groups that empty out."""
+    _upsert_add(conn, MarketStat, TOTAL_FIELDS, rollup.total_rows())
+    _upsert_add(conn, MarketStatBucket, ("count",), rollup.bucket_rows())
+    if any(totals["listings"] < 0 for totals in rollup.totals.values()):
+        conn.execute(delete(MarketStat.__table__).where(MarketStat.listings <= 0))
+        conn.execute(delete(MarketStatBucket.__table__).where(MarketStatBucket.count <= 0))
+
+
+def rebuild(conn: Connection, chunk_size: int = 10_000) -> int:
+    """Recompute both rollup tables from a full scan of ``properties``.
+
+    Rows are streamed from a server-side cursor and folded into the
+    rollup ``chunk_size`` at a time. The tables are replaced at the end in
+    one transaction. Returns the number of listings scanned.
+    """
+    rollup = Rollup()
+    columns = [getattr(Property, field) for field in TRACKED_FIELDS]
+    scanned = 0
+    result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(select(*columns))
+    for rows in result.partitions():
+        for row in rows:
+            rollup.add(row._mapping)
+        scanned += len(rows)
+
+    conn.execute(delete(MarketStatBucket.__table__))
+    conn.execute(delete(MarketStat.__table__))
+    for model, rows in ((MarketStat, rollup.total_rows()), (MarketStatBucket, rollup.bucket_rows())):
+        for start in range(0, len(rows), chunk_size):
+            conn.execute(insert(model.__table__), rows[start : start + chunk_size])
+    return scanned
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    """Fold this flush's Property changes into the rollups, in the same transaction."""
+    rollup = Rollup()
+    for before, after in property_changes(session, TRACKED_FIELDS):
+        if before is not None:
+            rollup.add(before, -1)
+        if after is not None:
+            rollup.add(after)
+    if rollup:
+        apply(session.connection(), rollup)
+
+
+_listeners_installed = False
+
+
+def init_stats(app: Flask) -> None:
+    """Keep the rollups in step with ORM writes to Property.
+
+    Core statements (``flask seed --bulk``) bypass this; they rebuild the
+    rollups afterwards.
+    """
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Session, "after_flush", _after_flush)
+        _listeners_installed = True
+
+
+# /api/stats filter param -> rollup column
+FILTERS = {"state": "state", "city": "city", "zipcode": "zipcode", "type": "property_type"}
+GROUP_BY = ("state", "city", "zipcode", "property_type")
+
+
+def _median(histogram: Dict[int, int]) -> Optional[float]:
+    """Median of a bucket histogram, interpolated log-linearly inside its bucket."""
+    total = sum(histogram.values())
+    if total <= 0:
+        return None
+    half = total / 2
+    seen = 0
+    for bucket in sorted(histogram):
+        count = histogram[bucket]
+        if count and seen + count >= half:
+            fraction = (half - seen) / count
+            return BUCKET_RATIO ** (bucket + fraction)
+        seen += count
+    return None
+
+
+def _summary(totals: Dict[str, Any], histograms: Dict[str, Dict[int, int]], now: int) -> Dict[str, Any]:
+    listings = totals["listings"]
+    price_median = _median(histograms.get("price", {}))
+    ppsf_median = _median(histograms.get("price_per_sqft", {}))
+    return {
+        "listings": listings,
+        "median_price": round(price_median) if price_median is not None else None,
+        "avg_price": round(totals["price_sum"] / listings) if listings else None,
+        "median_price_per_sqft": round(ppsf_median, 2) if ppsf_median is not None else None,
+        "avg_price_per_sqft": (
+            round(totals["price_per_sqft_sum"] / totals["sqft_listings"], 2) if totals["sqft_listings"] else None
+        ),
+        # Days since listing, averaged; there is no sold/closed date to stop the clock
+        "avg_days_on_market": round((now - totals["listed_at_sum"] / listings) / 86400, 1) if listings else None,
+    }
+
+
+def market_stats(session: Session, filters: Dict[str, str], group_by: Optional[str], limit: int) -> Dict[str, Any]:
+    """Merge rollup rows matching ``filters`` into per-status and overall stats.
+
+    With ``group_by`` (a GROUP_BY column) the result is split into the
+    ``limit`` largest groups by listing count. Reads two small GROUP BY
+    queries over the rollup tables, never ``properties``.
+    """
+    group_columns = [group_by] if group_by else []
+
+    def where(model):
+        return [getattr(model, column) == value for column, value in filters.items()]
+
+    total_cols = [func.sum(getattr(MarketStat, field)).label(field) for field in TOTAL_FIELDS]
+    keys = [getattr(MarketStat, column) for column in group_columns] + [MarketStat.status]
+    totals_rows = session.execute(select(*keys, *total_cols).where(*where(MarketStat)).group_by(*keys)).all()
+
+    bucket_keys = [getattr(MarketStatBucket, column) for column in group_columns] + [
+        MarketStatBucket.status,
+        MarketStatBucket.metric,
+        MarketStatBucket.bucket,
+    ]
+    bucket_rows = session.execute(
+        select(*bucket_keys, func.sum(MarketStatBucket.count)).where(*where(MarketStatBucket)).group_by(*bucket_keys)
+    ).all()
+
+    # group -> status -> totals / metric histograms; status None is the group overall
+    totals: Dict[Any, Dict[Any, Counter]] = defaultdict(lambda: defaultdict(Counter))
+    histograms: Dict[Any, Dict[Any, Dict[str, Counter]]] = defaultdict(
+        lambda: defaultdict(lambda: defaultdict(Counter))
+    )
+    for row in totals_rows:
+        group = row[0] if group_by else None
+        status = row.status
+        for field in TOTAL_FIELDS:
+            # MySQL returns SUM() as Decimal
+            value = (float if field == "price_per_sqft_sum" else int)(getattr(row, field) or 0)
+            totals[group][status][field] += value
+            totals[group][None][field] += value
+    for row in bucket_rows:
+        group = row[0] if group_by else None
+        *_, status, metric, bucket, count = row
+        histograms[group][status][metric][bucket] += int(count)
+        histograms[group][None][metric][bucket] += int(count)
+
+    now = int(time.time())
+
+    def block(group) -> Dict[str, Any]:
+        statuses = sorted(status for status in totals[group] if status is not None)
+        return {
+            **_summary(totals[group][None], histograms[group][None], now),
+            "active_listings": totals[group].get("for_sale", Counter())["listings"],
+            "by_status": {
+                status: _summary(totals[group][status], histograms[group][status], now) for status in statuses
+            },
+        }
+
+    if not group_by:
+        return block(None) if totals else {**_summary(Counter(), {}, now), "active_listings": 0, "by_status": {}}
+
+    largest = sorted(totals, key=lambda group: (-totals[group][None]["listings"], group))[:limit]
+    return {"groups": [{group_by: group, **block(group)} for group in largest]}
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from .changes import property_changes
+from .extensions import db
+from .models import Property
+
+# Suggestion kinds in the order they win ties
+KINDS = ("state", "city", "zipcode", "address")
+SUGGEST_FIELDS = ("address_line", "city", "state", "zipcode")
+
+_CHANGES = "suggest_changes"
+# Short prefixes match many entries; their ranked results are memoized
+MEMO_PREFIX_LEN = 3
+MEMO_MAX_ENTRIES = 4096
+
+
+def _norm(value: str) -> str:
+    return " ".join(value.casefold().split())
+
+
+def _labels(values: Dict[str, Any], with_address: bool) -> Iterable[Tuple[str, str]]:
+    """``(kind, label)`` entries one listing contributes to the index."""
+    yield "state", values["state"]
+    yield "city", f"{values['city']}, {values['state']}"
+    yield "zipcode", values["zipcode"]
+    if with_address:
+        yield "address", f"{values['address_line']}, {values['city']}, {values['state']}"
+
+
+class _Terms:
+    """Labels sorted by normalized form, with listing counts.
+
+    The sorted list and the count dict share the label strings, so each
+    distinct value costs one string plus a list slot and a dict entry.
+    """
+
+    def __init__(self, counts: Dict[str, int]) -> None:
+        self.counts = counts
+        self.sorted = sorted(counts, key=_norm)
+
+    def add(self, label: str, delta: int) -> None:
+        count = self.counts.get(label, 0) + delta
+        if count > 0:
+            if label not in self.counts:
+                insort(self.sorted, label, key=_norm)
+            self.counts[label] = count
+        elif label in self.counts:
+            del self.counts[label]
+            index = bisect_left(self.sorted, _norm(label), key=_norm)
+            while self.sorted[index] != label:
+                index += 1
+            del self.sorted[index]
+
+    def range(self, prefix: str) -> Tuple[int, int]:
+        return (
+            bisect_left(self.sorted, prefix, key=_norm),
+            bisect_left(self.sorted, prefix + "\U0010ffff", key=_norm),
+        )
+
+
+class SuggestIndex:
+    """In-process prefix index over city, state, zipcode and address labels.
+
+    Lookups are two binary searches per kind plus a pass over the matching
+    distinct values (memoized for short prefixes), so they don't grow
+    with the number of listings. Addresses are nearly all unique, so
+    they come back in alphabetical order rather than by count, which
+    keeps their cost at ``O(log n + limit)``.
+    """
+
+    def __init__(self, terms: Dict[str, _Terms], with_address: bool) -> None:
+        self.terms = terms
+        self.with_address = with_address
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+        # prefix -> limit -> suggestions, for prefixes up to MEMO_PREFIX_LEN
+        self._memo: Dict[str, Dict[int, List[Dict[str, Any]]]] = {}
+
+    @classmethod
+    def build(cls, session, with_address: bool = True, chunk_size: int = 10_000) -> "SuggestIndex":
+        """Load distinct labels and their listing counts with GROUP BY scans."""
+        counts: Dict[str, Dict[str, int]] = {kind: {} for kind in KINDS}
+        groups = [Property.state, Property.city, Property.zipcode]
+        if with_address:
+            groups.append(Property.address_line)
+        statement = select(*groups, func.count()).group_by(*groups)
+        result = session.execute(statement, execution_options={"stream_results": True, "yield_per": chunk_size})
+        for rows in result.partitions():
+            for *values, count in rows:
+                row = dict(zip(("state", "city", "zipcode", "address_line"), values))
+                for kind, label in _labels(row, with_address):
+                    counts[kind][label] = counts[kind].get(label, 0) + count
+        return cls({kind: _Terms(counts[kind]) for kind in KINDS}, with_address)
+
+    def apply(self, changes: Iterable[Tuple[Dict[str, Any], int]]) -> None:
+        with self._lock:
+            for values, sign in changes:
+                for kind, label in _labels(values, self.with_address):
+                    self.terms[kind].add(label, sign)
+                    key = _norm(label)
+                    for length in range(1, MEMO_PREFIX_LEN + 1):
+                        self._memo.pop(key[:length], None)
+
+    def _ranked(self, kind: str, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        terms = self.terms[kind]
+        start, stop = terms.range(prefix)
+        if kind == "address":
+            labels = terms.sorted[start : min(stop, start + limit)]
+        else:
+            labels = heapq.nsmallest(
+                limit, terms.sorted[start:stop], key=lambda label: (-terms.counts[label], _norm(label))
+            )
+        return [{"type": kind, "label": label, "count": terms.counts[label]} for label in labels]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        prefix = _norm(prefix)
+        if not prefix:
+            return []
+        cached = self._memo.get(prefix, {}).get(limit)
+        if cached is not None:
+            return cached
+
+        found: List[Dict[str, Any]] = []
+        for kind in KINDS:
+            if kind in self.terms:
+                found.extend(self._ranked(kind, prefix, limit))
+        order = {kind: i for i, kind in enumerate(KINDS)}
+        found.sort(key=lambda item: (_norm(item["label"]) != prefix, -item["count"], order[item["type"]]))
+        found = found[:limit]
+
+        if len(prefix) <= MEMO_PREFIX_LEN and len(self._memo) < MEMO_MAX_ENTRIES:
+            self._memo.setdefault(prefix, {})[limit] = found
+        return found
+
+
+def get_index() -> Optional[SuggestIndex]:
+    """The app's index, or None while it is still being built.
+
+    The first call starts building it in the background; after that it is
+    rebuilt in the background when stale. Writes made through this
+    process's sessions are applied as they commit;
+    SUGGEST_REFRESH_SECONDS bounds how long other workers' writes take to
+    show up.
+    """
+    app = current_app._get_current_object()
+    state = app.extensions["suggest"]
+    index = state["index"]
+    refresh = app.config.get("SUGGEST_REFRESH_SECONDS", 300)
+    stale = index is not None and refresh and time.monotonic() - index.built_at > refresh
+    if (index is None or stale) and state["lock"].acquire(blocking=False):
+        if index is not None:
+            index.built_at = time.monotonic()  # one rebuild at a time
+        threading.Thread(target=_rebuild, args=(app, state), daemon=True).start()
+    return index
+
+
+def _rebuild(app: Flask, state: Dict[str, Any]) -> None:
+    try:
+        with app.app_context():
+            state["index"] = SuggestIndex.build(db.session, app.config.get("SUGGEST_ADDRESSES", True))
+            db.session.remove()
+    finally:
+        state["lock"].release()
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    changes = session.info.setdefault(_CHANGES, [])
+    for before, after in property_changes(session, SUGGEST_FIELDS):
+        if before is not None:
+            changes.append((before, -1))
+        if after is not None:
+            changes.append((after, 1))
+
+
+def _after_commit(session: Session) -> None:
+    changes = session.info.pop(_CHANGES, None)
+    if changes and has_app_context():
+        state = current_app.extensions.get("suggest")
+        if state is not None and state["index"] is not None:
+            state["index"].apply(changes)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_CHANGES, None)
+
+
+_listeners_installed = False
+
+
+def init_suggest(app: Flask) -> None:
+    """Register the index (built in the background on first use) and keep it in step with commits."""
+    global _listeners_installed
+    app.extensions["suggest"] = {"index": None, "lock": threading.Lock()}
+
+    if _listeners_installed:
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
+    _listeners_installed = True
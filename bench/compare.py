@@ -0,0 +1,52 @@
+"""Compare two bench.run result files route by route.
+
+Usage::
+
+    python -m bench.compare bench/results/main.json bench/results/my-branch.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries_per_request")
+
+
+def _index(results: Dict) -> Dict[Tuple[str, int, str], Dict]:
+    return {(run["db"], run["size"], run["mode"]): run for run in results["runs"]}
+
+
+def _delta(before, after) -> str:
+    if before is None or after is None:
+        return f"{before} -> {after}"
+    change = (after - before) / before * 100 if before else 0.0
+    return f"{before} -> {after} ({change:+.1f}%)"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    with open(args.candidate) as fh:
+        candidate = json.load(fh)
+
+    print(f"baseline:  {baseline['meta']['branch']} {baseline['meta']['commit'][:10]}")
+    print(f"candidate: {candidate['meta']['branch']} {candidate['meta']['commit'][:10]}")
+    before_runs, after_runs = _index(baseline), _index(candidate)
+    for key in sorted(before_runs.keys() & after_runs.keys()):
+        before, after = before_runs[key], after_runs[key]
+        print(f"\n{key[0]} size={key[1]} mode={key[2]}  rss {_delta(before['peak_rss_mb'], after['peak_rss_mb'])} MB")
+        for route in sorted(before["routes"].keys() & after["routes"].keys()):
+            cells = "  ".join(f"{m}: {_delta(before['routes'][route][m], after['routes'][route][m])}" for m in METRICS)
+            print(f"  {route:32} {cells}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
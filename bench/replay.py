@@ -0,0 +1,171 @@
+"""Replay a request mix against one already-seeded database.
+
+Run by ``bench.run`` in a fresh subprocess per (database, size, mode) so
+peak RSS is measured per run; DATABASE_URL selects the database. Prints a
+single JSON object to stdout.
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import random
+import re
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urlencode
+
+_QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+Request = Tuple[str, str]  # (route label, path)
+
+
+def build_mix(app, count: int, seed: int) -> List[Request]:
+    """A reproducible, roughly production-shaped list of requests."""
+    from sqlalchemy import func, select
+
+    from app.extensions import db
+    from app.models import Property
+
+    rng = random.Random(seed)
+    with app.app_context():
+        max_id = db.session.scalar(select(func.max(Property.id))) or 1
+        cities = [c for (c,) in db.session.execute(select(Property.city).limit(200))] or ["Springfield"]
+
+    price_bands = [(None, 500_000), (250_000, 750_000), (500_000, 1_500_000), (1_000_000, None)]
+    sorts = ["newest", "newest", "price_asc", "price_desc"]
+
+    def listing() -> str:
+        params = {"sort": rng.choice(sorts)}
+        if rng.random() < 0.5:
+            low, high = rng.choice(price_bands)
+            if low:
+                params["min_price"] = low
+            if high:
+                params["max_price"] = high
+        if rng.random() < 0.3:
+            params["min_bed"] = rng.randint(1, 4)
+        if rng.random() < 0.2:
+            params["type"] = rng.choice(["house", "condo", "townhouse", "apartment"])
+        if rng.random() < 0.2:
+            params["q"] = rng.choice(cities)[: rng.randint(3, 6)]
+        if rng.random() < 0.3:
+            params["page"] = rng.randint(2, 20)
+        return "/api/properties?" + urlencode(params)
+
+    choices: List[Tuple[float, str, Callable[[], str]]] = [
+        (0.10, "pages.home", lambda: "/" if rng.random() < 0.7 else f"/?page={rng.randint(2, 10)}"),
+        (0.50, "properties.list_properties", listing),
+        (0.20, "properties.get_property", lambda: f"/api/properties/{rng.randint(1, max_id)}"),
+        (0.20, "pages.property_detail", lambda: f"/properties/{rng.randint(1, max_id)}"),
+    ]
+    mix: List[Request] = []
+    for _ in range(count):
+        roll, acc = rng.random(), 0.0
+        for weight, label, make in choices:
+            acc += weight
+            if roll <= acc:
+                mix.append((label, make()))
+                break
+        else:
+            mix.append((choices[-1][1], choices[-1][2]()))
+    return mix
+
+
+def _queries(server_timing: str) -> int:
+    match = _QUERIES_RE.search(server_timing or "")
+    return int(match.group(1)) if match else -1
+
+
+def replay_testclient(app, mix: List[Request]) -> List[Tuple[str, float, int, int]]:
+    client = app.test_client()
+    samples = []
+    for label, path in mix:
+        started = time.perf_counter()
+        response = client.get(path)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        samples.append((label, elapsed, response.status_code, _queries(response.headers.get("Server-Timing"))))
+    return samples
+
+
+def replay_wsgi(app, mix: List[Request]) -> List[Tuple[str, float, int, int]]:
+    """Serve the app with a real threaded WSGI server on localhost."""
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_port)
+    samples = []
+    try:
+        for label, path in mix:
+            started = time.perf_counter()
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            elapsed = time.perf_counter() - started
+            samples.append((label, elapsed, response.status, _queries(response.getheader("Server-Timing"))))
+    finally:
+        conn.close()
+        server.shutdown()
+    return samples
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[Tuple[str, float, int, int]]) -> Dict[str, Dict[str, float]]:
+    groups: Dict[str, List[Tuple[float, int, int]]] = defaultdict(list)
+    for label, elapsed, status, queries in samples:
+        groups[label].append((elapsed, status, queries))
+        groups["overall"].append((elapsed, status, queries))
+
+    summary = {}
+    for label, rows in sorted(groups.items()):
+        latencies = [elapsed * 1000 for elapsed, _, _ in rows]
+        queries = [q for _, _, q in rows if q >= 0]
+        summary[label] = {
+            "requests": len(rows),
+            "errors": sum(1 for _, status, _ in rows if status >= 500),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        }
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", choices=["testclient", "wsgi"], default="testclient")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    from app import create_app
+
+    app = create_app()
+    mix = build_mix(app, args.requests + args.warmup, args.seed)
+    replay = replay_testclient if args.mode == "testclient" else replay_wsgi
+
+    samples = replay(app, mix)[args.warmup:]
+    # ru_maxrss is KiB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    json.dump({"routes": summarize(samples), "peak_rss_mb": round(peak_rss_mb, 1)}, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
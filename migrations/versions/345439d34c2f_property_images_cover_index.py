@@ -0,0 +1,37 @@
+"""property_images cover index
+
+Replaces the property_id index with (property_id, is_primary, id): the
+cover_image_url probes (primary image, else first non-primary) each read
+the first matching index entry instead of sorting the listing's images.
+
+Revision ID: 345439d34c2f
+Revises: ba44da573eeb
+Create Date: 2026-10-17 19:12:40.218530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '345439d34c2f'
+down_revision = 'ba44da573eeb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create the replacement first: MySQL needs an index on the foreign key column
+    with op.batch_alter_table('property_images', schema=None) as batch_op:
+        batch_op.create_index(
+            'idx_property_images_property_id_is_primary_id',
+            ['property_id', 'is_primary', 'id'],
+            unique=False,
+        )
+        batch_op.drop_index('idx_property_images_property_id')
+
+
+def downgrade():
+    with op.batch_alter_table('property_images', schema=None) as batch_op:
+        batch_op.create_index('idx_property_images_property_id', ['property_id'], unique=False)
+        batch_op.drop_index('idx_property_images_property_id_is_primary_id')
@@ -0,0 +1,35 @@
+"""keyset sort indexes
+
+Revision ID: 5c1f2a9d8e40
+Revises: 0217c48494b7
+Create Date: 2026-10-17 09:12:44.501233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1f2a9d8e40'
+down_revision = '0217c48494b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Composite (sort key, id) indexes replace the single-column ones: their
+    # prefix still serves plain ORDER BY price / created_at, and the id suffix
+    # lets cursor pagination seek instead of scanning an OFFSET.
+    with op.batch_alter_table('properties', schema=None) as batch_op:
+        batch_op.create_index('idx_properties_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('idx_properties_price_id', ['price', 'id'], unique=False)
+        batch_op.drop_index('idx_properties_created_at')
+        batch_op.drop_index('ix_properties_price')
+
+
+def downgrade():
+    with op.batch_alter_table('properties', schema=None) as batch_op:
+        batch_op.create_index('ix_properties_price', ['price'], unique=False)
+        batch_op.create_index('idx_properties_created_at', ['created_at'], unique=False)
+        batch_op.drop_index('idx_properties_price_id')
+        batch_op.drop_index('idx_properties_created_at_id')
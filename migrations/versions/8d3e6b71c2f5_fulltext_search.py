@@ -0,0 +1,67 @@
+"""fulltext search
+
+Revision ID: 8d3e6b71c2f5
+Revises: 5c1f2a9d8e40
+Create Date: 2026-10-17 11:40:03.118902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3e6b71c2f5'
+down_revision = '5c1f2a9d8e40'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with app.fulltext.SEARCH_COLUMNS
+COLUMNS = ['title', 'city', 'state', 'zipcode', 'address_line']
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'mysql':
+        op.create_index('ft_properties_search', 'properties', COLUMNS, mysql_prefix='FULLTEXT')
+
+    elif dialect == 'sqlite':
+        cols = ', '.join(COLUMNS)
+        new_vals = ', '.join(f'new.{c}' for c in COLUMNS)
+        old_vals = ', '.join(f'old.{c}' for c in COLUMNS)
+        # External-content FTS5 table: stores only the index, rows live in
+        # properties. Triggers keep it in step with every write, including
+        # Core bulk inserts that bypass ORM events.
+        op.execute(
+            f"CREATE VIRTUAL TABLE properties_fts USING fts5({cols}, "
+            "content='properties', content_rowid='id', prefix='2 3')"
+        )
+        op.execute(
+            "CREATE TRIGGER properties_fts_ai AFTER INSERT ON properties BEGIN "
+            f"INSERT INTO properties_fts(rowid, {cols}) VALUES (new.id, {new_vals}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER properties_fts_ad AFTER DELETE ON properties BEGIN "
+            f"INSERT INTO properties_fts(properties_fts, rowid, {cols}) "
+            f"VALUES ('delete', old.id, {old_vals}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER properties_fts_au AFTER UPDATE OF {cols} ON properties BEGIN "
+            f"INSERT INTO properties_fts(properties_fts, rowid, {cols}) "
+            f"VALUES ('delete', old.id, {old_vals}); "
+            f"INSERT INTO properties_fts(rowid, {cols}) VALUES (new.id, {new_vals}); END"
+        )
+        op.execute("INSERT INTO properties_fts(properties_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'mysql':
+        op.drop_index('ft_properties_search', table_name='properties')
+
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS properties_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS properties_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS properties_fts_ai")
+        op.execute("DROP TABLE IF EXISTS properties_fts")
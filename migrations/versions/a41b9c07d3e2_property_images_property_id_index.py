@@ -0,0 +1,26 @@
+"""property_images property_id index
+
+Revision ID: a41b9c07d3e2
+Revises: 8d3e6b71c2f5
+Create Date: 2026-10-17 14:02:51.774310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41b9c07d3e2'
+down_revision = '8d3e6b71c2f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('property_images', schema=None) as batch_op:
+        batch_op.create_index('idx_property_images_property_id', ['property_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('property_images', schema=None) as batch_op:
+        batch_op.drop_index('idx_property_images_property_id')
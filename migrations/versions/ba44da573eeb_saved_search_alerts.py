@@ -0,0 +1,68 @@
+"""saved search alerts
+
+Saved searches, the outbox `flask run-alerts` fills, and the per-batch run
+log that records how far into property_changes alerts have been matched.
+
+Revision ID: ba44da573eeb
+Revises: f3a9c61d0b84
+Create Date: 2026-10-17 18:41:12.503317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ba44da573eeb'
+down_revision = 'f3a9c61d0b84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('alert_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('changes', sa.Integer(), nullable=False),
+    sa.Column('notifications', sa.Integer(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('saved_searches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('filters', sa.Text(), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('saved_searches', schema=None) as batch_op:
+        batch_op.create_index('idx_saved_searches_email', ['email'], unique=False)
+
+    op.create_table('alert_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('saved_search_id', sa.Integer(), nullable=False),
+    sa.Column('property_id', sa.Integer(), nullable=False),
+    sa.Column('reason', sa.String(length=20), nullable=False),
+    sa.Column('price', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['saved_search_id'], ['saved_searches.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('alert_outbox', schema=None) as batch_op:
+        batch_op.create_index('idx_alert_outbox_saved_search_id', ['saved_search_id'], unique=False)
+        batch_op.create_index('idx_alert_outbox_sent_at_id', ['sent_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('alert_outbox', schema=None) as batch_op:
+        batch_op.drop_index('idx_alert_outbox_sent_at_id')
+        batch_op.drop_index('idx_alert_outbox_saved_search_id')
+
+    op.drop_table('alert_outbox')
+    with op.batch_alter_table('saved_searches', schema=None) as batch_op:
+        batch_op.drop_index('idx_saved_searches_email')
+
+    op.drop_table('saved_searches')
+    op.drop_table('alert_runs')
@@ -0,0 +1,60 @@
+"""geo cell
+
+Revision ID: c7e2f4a81b96
+Revises: a41b9c07d3e2
+Create Date: 2026-10-17 16:25:37.402815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2f4a81b96'
+down_revision = 'a41b9c07d3e2'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with app.geo
+CELL_DEG = 0.25
+LAT_CELLS = 720
+LON_CELLS = 1440
+
+
+def upgrade():
+    with op.batch_alter_table('properties', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geo_cell', sa.Integer(), nullable=True))
+
+    properties = sa.table(
+        'properties',
+        sa.column('geo_cell', sa.Integer),
+        sa.column('latitude', sa.Float),
+        sa.column('longitude', sa.Float),
+    )
+    if op.get_bind().dialect.name == 'sqlite':
+        # CAST truncates, which is floor() for the non-negative offsets below;
+        # two-argument min() is SQLite's least()
+        def cell_index(offset, cells):
+            return sa.func.min(sa.cast(offset / CELL_DEG, sa.Integer), cells - 1)
+    else:
+        def cell_index(offset, cells):
+            return sa.func.least(sa.func.floor(offset / CELL_DEG), cells - 1)
+
+    op.execute(
+        properties.update()
+        .where(properties.c.latitude.isnot(None), properties.c.longitude.isnot(None))
+        .values(
+            geo_cell=cell_index(properties.c.latitude + 90, LAT_CELLS) * LON_CELLS
+            + cell_index(properties.c.longitude + 180, LON_CELLS)
+        )
+    )
+
+    with op.batch_alter_table('properties', schema=None) as batch_op:
+        batch_op.create_index('idx_properties_geo', ['geo_cell', 'latitude', 'longitude'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('properties', schema=None) as batch_op:
+        batch_op.drop_index('idx_properties_geo')
+    # Not in batch mode: a SQLite table rebuild would drop the FTS triggers
+    op.drop_column('properties', 'geo_cell')
@@ -0,0 +1,51 @@
+"""market stats
+
+Rollup tables maintained by app/stats.py. Existing listings are not
+counted until ``flask rebuild-stats`` has run once.
+
+Revision ID: c8469cdeffd2
+Revises: c7e2f4a81b96
+Create Date: 2026-10-17 15:30:59.779050
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8469cdeffd2'
+down_revision = 'c7e2f4a81b96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('market_stat_buckets',
+    sa.Column('state', sa.String(length=20), nullable=False),
+    sa.Column('city', sa.String(length=120), nullable=False),
+    sa.Column('zipcode', sa.String(length=20), nullable=False),
+    sa.Column('property_type', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('metric', sa.String(length=20), nullable=False),
+    sa.Column('bucket', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('state', 'city', 'zipcode', 'property_type', 'status', 'metric', 'bucket')
+    )
+    op.create_table('market_stats',
+    sa.Column('state', sa.String(length=20), nullable=False),
+    sa.Column('city', sa.String(length=120), nullable=False),
+    sa.Column('zipcode', sa.String(length=20), nullable=False),
+    sa.Column('property_type', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('listings', sa.Integer(), nullable=False),
+    sa.Column('price_sum', sa.BigInteger(), nullable=False),
+    sa.Column('sqft_listings', sa.Integer(), nullable=False),
+    sa.Column('price_per_sqft_sum', sa.Float(), nullable=False),
+    sa.Column('listed_at_sum', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('state', 'city', 'zipcode', 'property_type', 'status')
+    )
+
+
+def downgrade():
+    op.drop_table('market_stats')
+    op.drop_table('market_stat_buckets')
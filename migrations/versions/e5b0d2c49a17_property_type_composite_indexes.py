@@ -0,0 +1,40 @@
+"""property_type composite indexes
+
+Proposed by ``flask db-advise`` for the list endpoint's type filter under
+each sort. Range filters (bedrooms, price) trail the sort columns so
+they are checked in the index.
+
+Revision ID: e5b0d2c49a17
+Revises: c8469cdeffd2
+Create Date: 2026-10-17 17:12:08.351946
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b0d2c49a17'
+down_revision = 'c8469cdeffd2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('properties', schema=None) as batch_op:
+        batch_op.create_index(
+            'idx_properties_property_type_created_at_bedrooms_price',
+            ['property_type', 'created_at', 'id', 'bedrooms', 'price'],
+            unique=False,
+        )
+        batch_op.create_index(
+            'idx_properties_property_type_price_bedrooms',
+            ['property_type', 'price', 'id', 'bedrooms'],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('properties', schema=None) as batch_op:
+        batch_op.drop_index('idx_properties_property_type_price_bedrooms')
+        batch_op.drop_index('idx_properties_property_type_created_at_bedrooms_price')
@@ -0,0 +1,53 @@
+"""property change log
+
+Append-only log behind /api/properties/changes. Existing listings are
+backfilled as inserts, so a client reading the feed from the start sees
+every listing.
+
+Revision ID: f3a9c61d0b84
+Revises: e5b0d2c49a17
+Create Date: 2026-10-17 17:58:40.126583
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9c61d0b84'
+down_revision = 'e5b0d2c49a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('property_changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('property_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('property_changes', schema=None) as batch_op:
+        batch_op.create_index('idx_property_changes_changed_at', ['changed_at'], unique=False)
+
+    properties = sa.table('properties', sa.column('id', sa.Integer), sa.column('updated_at', sa.DateTime))
+    changes = sa.table(
+        'property_changes',
+        sa.column('property_id', sa.Integer),
+        sa.column('kind', sa.String),
+        sa.column('changed_at', sa.DateTime),
+    )
+    op.execute(
+        changes.insert().from_select(
+            ['property_id', 'kind', 'changed_at'],
+            sa.select(properties.c.id, sa.literal('insert'), properties.c.updated_at).order_by(properties.c.id),
+        )
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('property_changes', schema=None) as batch_op:
+        batch_op.drop_index('idx_property_changes_changed_at')
+
+    op.drop_table('property_changes')